@@ -13,7 +13,14 @@
 # - In-session feedback (👍/👎) nudges weights
 # ----------------------------------------------------------------------------
 # Prereqs
-#   pip install streamlit google-cloud-aiplatform vertexai pdfminer.six python-docx beautifulsoup4 requests
+#   pip install streamlit google-cloud-aiplatform vertexai pdfminer.six python-docx beautifulsoup4 requests numpy cachetools
+#   pip install pymupdf   (optional, faster PDF text extraction; pdfminer.six is the fallback)
+#   pip install diskcache (optional, persists embeddings/Gemini parses across restarts)
+#   pip install selectolax (optional, fastest HTML text extraction for JD pages)
+#   pip install lxml      (optional, faster HTML parsing for JD pages)
+#   pip install simsimd   (optional, SIMD float16 similarity kernels)
+#   pip install orjson    (optional, faster JSON parsing)
+#   pip install torch     (optional, CUDA similarity for large resume batches)
 #   gcloud auth application-default login   (or set GOOGLE_APPLICATION_CREDENTIALS)
 #   export GOOGLE_CLOUD_PROJECT="your-project"; export GOOGLE_CLOUD_REGION="us-central1"
 # Run
@@ -27,13 +34,28 @@ import json
 import time
 import math
 import hashlib
-from typing import Dict, List, Tuple
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterator, List, Tuple
 
 import requests
 from bs4 import BeautifulSoup
+try:
+    import lxml  # noqa: F401 — C-backed HTML parser for BeautifulSoup
+    HTML_PARSER = "lxml"
+except Exception:
+    HTML_PARSER = "html.parser"
+
+try:
+    # Lexbor engine: C HTML parser, much faster than bs4 (the only one left in selectolax >= 1.0)
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from cachetools import LRUCache
 
 import streamlit as st
 
@@ -42,6 +64,11 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Parsers
+try:
+    import fitz  # PyMuPDF — C-backed, much faster than pdfminer
+except Exception:
+    fitz = None
+
 try:
     from pdfminer.high_level import extract_text as pdf_extract_text
 except Exception:
@@ -52,6 +79,51 @@ try:
 except Exception:
     docx = None
 
+# Similarity kernels (SIMD, native float16 support)
+try:
+    import simsimd as simd
+except Exception:
+    simd = None
+
+# GPU similarity for large batches (only used when a CUDA device is present)
+try:
+    import torch
+    _CUDA = torch.cuda.is_available()
+except Exception:
+    torch, _CUDA = None, False
+
+# Fast JSON parsing for Gemini responses
+try:
+    import orjson
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+# Persistent cache (falls back to a bounded in-process LRU)
+try:
+    import diskcache
+except Exception:
+    diskcache = None
+
+
+class LockedLRUCache(LRUCache):
+    # In-process stand-in for diskcache, shared by worker threads (a plain LRUCache isn't thread-safe)
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize=maxsize)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
 # Vertex AI
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part
@@ -70,6 +142,11 @@ PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
 EMBED_MODEL_NAME = "text-embedding-004"
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
+GEMINI_MAX_WORKERS = 8  # concurrent Gemini calls (keep under project QPS quota)
+GPU_MIN_ROWS = 100  # below this the host->device copy costs more than the matmul saves
+EMB_MEMO_SIZE = 8192  # in-process embeddings (float16, ~1.5 KB each)
+CACHE_FALLBACK_SIZE = 4096  # embeddings + Gemini parses kept when diskcache is missing
+CACHE_DIR = os.path.expanduser(os.getenv("TALENT_INTEL_CACHE_DIR", "~/.cache/talent_intel"))
 
 st.set_page_config(page_title="Talent Intel AI — MVP", page_icon="🛰️", layout="wide")
 st.title("🛰️ Talent Intel AI — Candidate Scoring & Resume Trust (MVP)")
@@ -99,10 +176,49 @@ def init_vertex() -> Tuple[GenerativeModel, TextEmbeddingModel]:
     return gemini, emb
 
 
+@st.cache_resource(show_spinner=False)
+def get_cache():
+    # Content-addressed cache for embeddings and Gemini parses; survives reruns and restarts
+    return diskcache.Cache(CACHE_DIR) if diskcache else LockedLRUCache(CACHE_FALLBACK_SIZE)
+
+
+@st.cache_resource(show_spinner=False)
+def get_emb_memo() -> LRUCache:
+    # In-process memo in front of the disk cache: repeat texts skip unpickling from disk.
+    # LRU-bounded so a long-running server doesn't grow it without limit
+    return LRUCache(maxsize=EMB_MEMO_SIZE)
+
+
+def _cache_key(*parts: str) -> str:
+    # blake2b is built in and faster than sha1/md5; 128 bits is ample for a cache key
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+_WS_RE = re.compile(r"\s+")  # \s also covers \xa0
+
 def _normalize_text(t: str) -> str:
-    t = t.replace("\xa0", " ")
-    t = re.sub(r"\s+", " ", t)
-    return t.strip()
+    return _WS_RE.sub(" ", t).strip()
+
+
+_HTML_DROP_TAGS = ["script", "style", "noscript", "header", "footer", "nav", "form"]
+_HTML_TEXT_TAGS = frozenset(["h1", "h2", "h3", "p", "li"])
+
+
+def _html_text_blocks(html: str) -> Iterator[str]:
+    # Raw text of each heading/paragraph/list item, in document order
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        for node in tree.css(",".join(_HTML_DROP_TAGS)):
+            node.decompose()
+        for node in tree.root.traverse() if tree.root else ():
+            if node.tag in _HTML_TEXT_TAGS:
+                yield node.text(separator=" ")
+        return
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(_HTML_DROP_TAGS):
+        tag.decompose()
+    for x in soup.find_all(list(_HTML_TEXT_TAGS)):
+        yield x.get_text(" ")
 
 
 @st.cache_data(show_spinner=False)
@@ -110,20 +226,32 @@ def fetch_jd_text(url: str) -> str:
     headers = {"User-Agent": "TalentIntelAI/1.0 (+demo)"}
     r = requests.get(url, headers=headers, timeout=20)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "form"]):
-        tag.decompose()
-    text_nodes = [x.get_text(" ") for x in soup.find_all(["h1", "h2", "h3", "p", "li"]) ]
-    text = "\n".join([_normalize_text(t) for t in text_nodes if t and _normalize_text(t)])
+    text_nodes = (_normalize_text(t) for t in _html_text_blocks(r.text))
     # crude dedupe
     uniq, seen = [], set()
-    for p in text.split("\n"):
-        key = hashlib.md5(p.encode("utf-8")).hexdigest()[:10]
-        if key not in seen:
-            seen.add(key); uniq.append(p)
+    for p in text_nodes:
+        if p and p not in seen:
+            seen.add(p); uniq.append(p)
     return "\n".join(uniq)[:20000]  # safety limit
 
 
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _docx_text(data: bytes) -> str:
+    # Walk the w:t runs of word/document.xml directly instead of building python-docx's object model
+    parts: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as z, z.open("word/document.xml") as doc_xml:
+        for _, el in ET.iterparse(doc_xml):
+            if el.tag == _W_NS + "t":
+                if el.text:
+                    parts.append(el.text)
+            elif el.tag == _W_NS + "p":
+                parts.append("\n")
+                el.clear()
+    return "".join(parts)
+
+
 def read_resume_file(file) -> str:
     name = file.name.lower()
     data = file.read()
@@ -133,11 +261,22 @@ def read_resume_file(file) -> str:
     except Exception:
         pass
 
+    if name.endswith(".pdf") and fitz:
+        try:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                return _normalize_text("\n".join(page.get_text() for page in doc))
+        except Exception:
+            pass
     if name.endswith(".pdf") and pdf_extract_text:
         try:
             return _normalize_text(pdf_extract_text(io.BytesIO(data)))
         except Exception:
             pass
+    if name.endswith(".docx"):
+        try:
+            return _normalize_text(_docx_text(data))
+        except Exception:
+            pass
     if (name.endswith(".docx") or name.endswith(".doc")) and docx:
         try:
             d = docx.Document(io.BytesIO(data))
@@ -151,22 +290,56 @@ def read_resume_file(file) -> str:
         return ""
 
 
-@st.cache_data(show_spinner=False)
 def embed_texts(_emb_model: TextEmbeddingModel, texts: List[str]) -> np.ndarray:
+    # Per-text cache lookup: only texts never embedded before are sent to Vertex
+    cache, memo = get_cache(), get_emb_memo()
+    keys = [_cache_key("emb", EMBED_MODEL_NAME, t) for t in texts]
+    found: Dict[str, np.ndarray] = {}
+    pending: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k in found or k in pending:
+            continue
+        v = memo.get(k)
+        if v is None:
+            v = cache.get(k)
+        if v is not None:
+            found[k] = memo[k] = v
+        else:
+            pending[k] = t
+
     # Call Vertex embeddings in batches to stay within quotas
-    vectors: List[List[float]] = []
+    pending_keys = list(pending)
     B = 32
-    for i in range(0, len(texts), B):
-        batch = texts[i:i+B]
-        res = _emb_model.get_embeddings(batch)
-        for e in res:
-            vectors.append(e.values)
-    return np.array(vectors, dtype=np.float32)
-
-
-def cosine(a: np.ndarray, b: np.ndarray) -> float:
-    a = a.reshape(1, -1); b = b.reshape(1, -1)
-    return float(cosine_similarity(a, b)[0, 0])
+    for i in range(0, len(pending_keys), B):
+        batch = pending_keys[i:i+B]
+        res = _emb_model.get_embeddings([pending[k] for k in batch])
+        # One array conversion per batch instead of one per vector
+        vecs = np.asarray([e.values for e in res], dtype=np.float16)
+        for k, v in zip(batch, vecs):
+            found[k] = memo[k] = cache[k] = v
+
+    # Preallocate the output (dim probed from the first vector) and fill it in place
+    dim = len(next(iter(found.values())))
+    vectors = np.empty((len(keys), dim), dtype=np.float32)
+    for i, k in enumerate(keys):
+        vectors[i] = found[k]
+    # L2-normalize once so cosine similarity downstream is a plain dot product;
+    # float16 is plenty for ranking and halves the bytes moved per comparison
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(1e-12)
+    return vectors.astype(np.float16)
+
+
+def similarities(M: np.ndarray, q: np.ndarray) -> np.ndarray:
+    # Cosine similarity of every (normalized, float16) row of M against q
+    if _CUDA and len(M) >= GPU_MIN_ROWS:
+        # One fp16 tensor-core GEMV on the GPU
+        with torch.inference_mode():
+            Mg = torch.from_numpy(np.ascontiguousarray(M)).to("cuda", non_blocking=True)
+            qg = torch.from_numpy(np.ascontiguousarray(q)).to("cuda")
+            return (Mg @ qg).float().cpu().numpy()
+    if simd is not None:
+        return 1.0 - np.asarray(simd.cdist(M, q.reshape(1, -1), metric="cosine"), dtype=np.float32).ravel()
+    return M.astype(np.float32) @ q.astype(np.float32)
 
 
 # -------------------------------
@@ -216,6 +389,29 @@ Only output JSON. No markdown. No commentary.
 """
 )
 
+# Resume parse + AI detection in one call (the resume text is sent once, not twice)
+COMBINED_RESUME_PROMPT = (
+    """
+You are an expert resume parser and AI-content auditor. Given resume text, return STRICT JSON with exactly two keys:
+{
+  "parsed": {
+    "name": string | null,
+    "titles": string[] (role titles found),
+    "seniority": one of ["intern","junior","mid","senior","lead","manager","director","executive"],
+    "skills": string[] (max 50, lowercase tokens),
+    "experience_bullets": string[] (concise bullets describing actual work done),
+    "education": string[]
+  },
+  "ai": {
+    "ai_likelihood_percent": number (0-100 integer, likelihood the text was generated or heavily edited by an LLM),
+    "rationale": string (short),
+    "flags": string[] (patterns such as generic phrasing, templated bullets, low-specificity)
+  }
+}
+Only output JSON. No markdown. No commentary.
+"""
+)
+
 # -------------------------------
 # Scoring Functions
 # -------------------------------
@@ -226,60 +422,91 @@ SENIORITY_MAP = {
 }
 
 
-def skills_overlap_score(jd_skills: List[str], res_skills: List[str]) -> float:
+# Perfect if equal; slight penalty if off by 1; larger penalty otherwise.
+# Precomputed once so scoring is a single index (and a NumPy gather in bulk).
+TRAJ_LUT = np.array([
+    [1.0 if i == j else 0.8 if abs(i - j) == 1 else 0.5 if abs(i - j) == 2 else 0.25 for j in range(8)]
+    for i in range(8)
+])
+
+
+def normalize_skills(skills: List[str]) -> FrozenSet[str]:
+    return frozenset(s.strip().lower() for s in skills)
+
+
+def skills_overlap_score(jd_skills: FrozenSet[str], res_skills: List[str]) -> float:
+    # jd_skills is normalized once per JD (normalize_skills), not once per resume
     if not jd_skills:
         return 0.0
-    jd = set([s.strip().lower() for s in jd_skills])
-    rs = set([s.strip().lower() for s in res_skills])
-    overlap = jd.intersection(rs)
-    return len(overlap) / max(1, len(jd))
+    rs = {s.strip().lower() for s in res_skills}
+    return len(jd_skills & rs) / len(jd_skills)
 
 
 def trajectory_alignment(jd_level: str, resume_level: str) -> float:
     a = SENIORITY_MAP.get((jd_level or "").lower(), 2)
     b = SENIORITY_MAP.get((resume_level or "").lower(), 2)
-    # Perfect if equal; slight penalty if off by 1; larger penalty otherwise
-    diff = abs(a - b)
-    if diff == 0:
-        return 1.0
-    if diff == 1:
-        return 0.8
-    if diff == 2:
-        return 0.5
-    return 0.25
-
-
-def candidate_score(exp_sim: float, skill_overlap: float, traj: float, w: Dict[str, float]) -> float:
+    return float(TRAJ_LUT[a, b])
+
+
+def candidate_scores(exp_sims: np.ndarray, skill_overlaps: np.ndarray, trajs: np.ndarray, w: Dict[str, float]) -> np.ndarray:
+    # Weighted sum for every resume at once, clipped to [0,1] and scaled to 0-100
     score = (
-        w["experience"] * exp_sim +
-        w["skills"] * skill_overlap +
-        w["trajectory"] * traj
+        w["experience"] * np.asarray(exp_sims, dtype=np.float64) +
+        w["skills"] * np.asarray(skill_overlaps, dtype=np.float64) +
+        w["trajectory"] * np.asarray(trajs, dtype=np.float64)
     )
-    return float(max(0.0, min(1.0, score))) * 100.0
+    return np.clip(score, 0.0, 1.0) * 100.0
 
 
 # -------------------------------
 # Gemini calls
 # -------------------------------
 
-def gemini_json(gemini: GenerativeModel, system_prompt: str, text: str) -> Dict:
+_JSON_SPAN = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def gemini_json(gemini: GenerativeModel, cache, system_prompt: str, text: str) -> Dict:
+    # Same prompt + text always parses the same way, so serve repeats from the cache.
+    # The cache is resolved by the caller on the script thread: worker threads have no
+    # ScriptRunContext, so they must not call st.cache_resource functions themselves
+    key = _cache_key("gemini", GEMINI_MODEL_NAME, system_prompt, text)
+    cached = cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    out = _gemini_json_uncached(gemini, system_prompt, text)
+    if out:
+        cache[key] = out
+    return out
+
+
+def _gemini_json_uncached(gemini: GenerativeModel, system_prompt: str, text: str) -> Dict:
     resp = gemini.generate_content([system_prompt, Part.from_text(text)], safety_settings=None)
     raw = resp.candidates[0].content.parts[0].text if resp and resp.candidates else "{}"
     # Normalize typical JSON formatting quirks
     raw = raw.strip().strip("` ")
     try:
-        return json.loads(raw)
+        return _json_loads(raw)
     except Exception:
-        # best-effort repair: attempt to find first/last braces
-        start = raw.find("{"); end = raw.rfind("}")
-        if start != -1 and end != -1 and end > start:
+        # best-effort repair: parse the span between the first "{" and the last "}"
+        m = _JSON_SPAN.search(raw)
+        if m:
             try:
-                return json.loads(raw[start:end+1])
+                return _json_loads(m.group(0))
             except Exception:
                 pass
     return {}
 
 
+def parse_resume_and_detect_ai(gemini: GenerativeModel, cache, text: str) -> Tuple[Dict, Dict]:
+    # One Gemini call for both tasks; fall back to the two separate prompts on schema violations
+    out = gemini_json(gemini, cache, COMBINED_RESUME_PROMPT, text)
+    parsed = out.get("parsed") if isinstance(out, dict) else None
+    ai = out.get("ai") if isinstance(out, dict) else None
+    if isinstance(parsed, dict) and isinstance(ai, dict):
+        return dict(parsed), dict(ai)
+    return gemini_json(gemini, cache, RESUME_PROMPT, text), gemini_json(gemini, cache, AI_DETECT_PROMPT, text)
+
+
 # -------------------------------
 # UI: Inputs
 # -------------------------------
@@ -321,67 +548,86 @@ process = st.button("⚡ Process Candidates", type="primary", disabled=not (jd_t
 
 if process:
     gemini, emb_model = init_vertex()
+    cache = get_cache()  # resolved here, on the script thread, and handed to the workers
 
     # Parse JD via Gemini
     with st.spinner("Analyzing JD with Gemini…"):
-        jd_struct = gemini_json(gemini, JD_PROMPT, jd_text)
+        jd_struct = gemini_json(gemini, cache, JD_PROMPT, jd_text)
         if not jd_struct:
             st.warning("JD parsing returned empty JSON. Proceeding with raw text only.")
         st.subheader("📋 JD Structure")
         st.json(jd_struct)
 
-    # Prepare JD embeddings on the responsibilities (or full text as fallback)
+    # Prepare JD embedding text from the responsibilities (or full text as fallback)
     jd_resp_text = "\n".join(jd_struct.get("responsibilities", [])) if jd_struct else jd_text
     if not jd_resp_text:
         jd_resp_text = jd_text
-    jd_vec = embed_texts(emb_model, [jd_resp_text])[0]
 
     # JD required skills for skill overlap
     jd_req_skills = jd_struct.get("required_skills", []) if jd_struct else []
+    jd_skill_set = normalize_skills(jd_req_skills)
 
-    rows = []
-
+    # Pass 1: extract text from every resume
+    texts = []
     for file in resumes:
-        with st.spinner(f"Processing {file.name}…"):
-            res_text = read_resume_file(file)
-            if not res_text:
-                st.error(f"Could not parse text from {file.name}")
-                continue
-
-            # Parse resume via Gemini
-            res_struct = gemini_json(gemini, RESUME_PROMPT, res_text)
-
-            # AI detection via Gemini
-            ai_struct = gemini_json(gemini, AI_DETECT_PROMPT, res_text)
-            ai_pct = int(ai_struct.get("ai_likelihood_percent", 0))
-            ai_pct = max(0, min(100, ai_pct))
-            validity_pct = 100 - ai_pct
-
-            # Experience similarity: embeddings similarity between JD responsibilities and resume experience bullets (or full resume)
-            exp_text = "\n".join(res_struct.get("experience_bullets", [])) if res_struct else res_text
-            res_vec = embed_texts(emb_model, [exp_text])[0]
-            exp_sim = (cosine(jd_vec, res_vec) + 1) / 2.0  # map [-1,1] -> [0,1]
-
-            # Skill overlap
-            skill_overlap = skills_overlap_score(jd_req_skills, res_struct.get("skills", []) if res_struct else [])
-
-            # Trajectory alignment
-            traj = trajectory_alignment(jd_struct.get("seniority", "mid") if jd_struct else "mid",
-                                        res_struct.get("seniority", "mid") if res_struct else "mid")
-
-            score = candidate_score(exp_sim, skill_overlap, traj, st.session_state.weights)
-
-            rows.append({
-                "file": file.name,
-                "parsed": res_struct,
-                "ai": ai_struct,
-                "ai_pct": ai_pct,
-                "validity_pct": validity_pct,
-                "exp_sim": exp_sim,
-                "skill_overlap": skill_overlap,
-                "trajectory": traj,
-                "score": score,
-            })
+        res_text = read_resume_file(file)
+        if not res_text:
+            st.error(f"Could not parse text from {file.name}")
+            continue
+        texts.append((file, res_text))
+
+    # Gemini parsing + AI detection are network-bound, so fan them out over a thread pool
+    parsed = []
+    if texts:
+        with st.spinner(f"Analyzing {len(texts)} resume(s) with Gemini…"):
+            with ThreadPoolExecutor(max_workers=GEMINI_MAX_WORKERS) as pool:
+                futs = [pool.submit(parse_resume_and_detect_ai, gemini, cache, t) for _, t in texts]
+                for (file, res_text), fut in zip(texts, futs):
+                    res_struct, ai_struct = fut.result()
+
+                    # Experience text: resume experience bullets (or full resume)
+                    exp_text = "\n".join(res_struct.get("experience_bullets", [])) if res_struct else res_text
+                    parsed.append((file, res_struct, ai_struct, exp_text))
+
+    # Experience similarity: embed the JD and every resume in one batched call,
+    # then compare them all against the JD with a single matrix-vector product
+    exp_sims = []
+    if parsed:
+        with st.spinner("Embedding JD and resumes…"):
+            M = embed_texts(emb_model, [jd_resp_text] + [p[3] for p in parsed])
+        exp_sims = (similarities(M[1:], M[0]) + 1) / 2.0  # map [-1,1] -> [0,1]
+
+    # Pass 2: score
+    rows = []
+    for (file, res_struct, ai_struct, _), exp_sim in zip(parsed, exp_sims):
+        exp_sim = float(exp_sim)
+        ai_pct = int(ai_struct.get("ai_likelihood_percent", 0))
+        ai_pct = max(0, min(100, ai_pct))
+        validity_pct = 100 - ai_pct
+
+        # Skill overlap
+        skill_overlap = skills_overlap_score(jd_skill_set, res_struct.get("skills", []) if res_struct else [])
+
+        # Trajectory alignment
+        traj = trajectory_alignment(jd_struct.get("seniority", "mid") if jd_struct else "mid",
+                                    res_struct.get("seniority", "mid") if res_struct else "mid")
+
+        rows.append({
+            "file": file.name,
+            "parsed": res_struct,
+            "ai": ai_struct,
+            "ai_pct": ai_pct,
+            "validity_pct": validity_pct,
+            "exp_sim": exp_sim,
+            "skill_overlap": skill_overlap,
+            "trajectory": traj,
+        })
+
+    # Final scores in one vectorized pass over all resumes
+    scores = candidate_scores([r["exp_sim"] for r in rows], [r["skill_overlap"] for r in rows],
+                              [r["trajectory"] for r in rows], st.session_state.weights)
+    for r, score in zip(rows, scores):
+        r["score"] = float(score)
 
     # Rank and Display
     if rows:
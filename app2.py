@@ -1,7 +1,16 @@
 # app.py — FastAPI backend for Talent Intel AI
 # Run: uvicorn app:app --reload --port 8001
 # Prereqs:
-#   pip install fastapi uvicorn python-multipart google-cloud-aiplatform vertexai pdfminer.six python-docx beautifulsoup4 requests numpy scikit-learn python-dotenv
+#   pip install fastapi uvicorn python-multipart google-cloud-aiplatform vertexai pdfminer.six python-docx beautifulsoup4 requests numpy python-dotenv cachetools
+#   pip install pymupdf   (optional, faster PDF text extraction; pdfminer.six is the fallback)
+#   pip install diskcache (optional, persists embeddings/Gemini parses across restarts)
+#   pip install selectolax (optional, fastest HTML text extraction for JD pages)
+#   pip install lxml      (optional, faster HTML parsing for JD pages)
+#   pip install simsimd   (optional, SIMD float16 similarity kernels)
+#   pip install pyahocorasick (optional, single-pass skill matching)
+#   pip install orjson    (optional, faster JSON parsing)
+#   pip install torch     (optional, CUDA similarity for large resume batches)
+#   pip install "httpx[http2]" (optional, pooled async HTTP/2 client for JD fetches)
 # Env:
 #   gcloud auth application-default login
 #   export GOOGLE_CLOUD_PROJECT="your-project"
@@ -11,13 +20,34 @@ import io
 import os
 import re
 import json
+import asyncio
 import hashlib
-from typing import Dict, List, Tuple, Optional
+import threading
+import heapq
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, FrozenSet, Iterator, List, Tuple, Optional
 import requests
 from bs4 import BeautifulSoup
+try:
+    import lxml  # noqa: F401 — C-backed HTML parser for BeautifulSoup
+    HTML_PARSER = "lxml"
+except Exception:
+    HTML_PARSER = "html.parser"
+
+try:
+    # Lexbor engine: C HTML parser, much faster than bs4 (the only one left in selectolax >= 1.0)
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import httpx
+except Exception:
+    httpx = None
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from cachetools import LRUCache
 
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
@@ -39,6 +69,11 @@ except Exception:
 # -------------------------------
 # Parsers
 # -------------------------------
+try:
+    import fitz  # PyMuPDF — C-backed, much faster than pdfminer
+except Exception:
+    fitz = None
+
 try:
     from pdfminer.high_level import extract_text as pdf_extract_text
 except Exception:
@@ -49,6 +84,57 @@ try:
 except Exception:
     docx = None
 
+# Similarity kernels (SIMD, native float16 support)
+try:
+    import simsimd as simd
+except Exception:
+    simd = None
+
+# GPU similarity for large batches (only used when a CUDA device is present)
+try:
+    import torch
+    _CUDA = torch.cuda.is_available()
+except Exception:
+    torch, _CUDA = None, False
+
+# Multi-pattern skill matching (single pass over bullet text)
+try:
+    import ahocorasick  # pyahocorasick
+except Exception:
+    ahocorasick = None
+
+# Fast JSON parsing for Gemini responses
+try:
+    import orjson
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+# Persistent cache (falls back to a bounded in-process LRU)
+try:
+    import diskcache
+except Exception:
+    diskcache = None
+
+
+class LockedLRUCache(LRUCache):
+    # In-process stand-in for diskcache, shared by worker threads (a plain LRUCache isn't thread-safe)
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize=maxsize)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
 # -------------------------------
 # Config
 # -------------------------------
@@ -56,6 +142,12 @@ PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
 EMBED_MODEL_NAME = "text-embedding-004"
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
+GEMINI_MAX_CONCURRENCY = 8  # in-flight Gemini calls, shared across requests (QPS guard)
+EMBED_MAX_CONCURRENCY = 4   # in-flight embedding batches (32 texts each)
+GPU_MIN_ROWS = 100  # below this the host->device copy costs more than the matmul saves
+EMB_MEMO_SIZE = 8192  # in-process embeddings (float16, ~1.5 KB each)
+CACHE_FALLBACK_SIZE = 4096  # embeddings + Gemini parses kept when diskcache is missing
+CACHE_DIR = os.path.expanduser(os.getenv("TALENT_INTEL_CACHE_DIR", "~/.cache/talent_intel"))
 
 def init_vertex() -> Tuple[GenerativeModel, TextEmbeddingModel]:
     if not PROJECT_ID:
@@ -67,37 +159,107 @@ def init_vertex() -> Tuple[GenerativeModel, TextEmbeddingModel]:
 
 gemini, emb_model = init_vertex()
 
+# Content-addressed cache for embeddings and Gemini parses
+_cache = diskcache.Cache(CACHE_DIR) if diskcache else LockedLRUCache(CACHE_FALLBACK_SIZE)
+# In-process memo in front of the disk cache: repeat texts skip unpickling from disk.
+# LRU-bounded so a long-running server doesn't grow it without limit
+_emb_memo: LRUCache = LRUCache(maxsize=EMB_MEMO_SIZE)
+_embed_sem = asyncio.Semaphore(EMBED_MAX_CONCURRENCY)
+
+def _cache_key(*parts: str) -> str:
+    # blake2b is built in and faster than sha1/md5; 128 bits is ample for a cache key
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
 # -------------------------------
 # Utility
 # -------------------------------
+_WS_RE = re.compile(r"\s+")  # \s also covers \xa0
+
 def _normalize_text(t: str) -> str:
-    t = t.replace("\xa0", " ")
-    t = re.sub(r"\s+", " ", t)
-    return t.strip()
+    return _WS_RE.sub(" ", t).strip()
+
+_HTML_DROP_TAGS = ["script", "style", "noscript", "header", "footer", "nav", "form"]
+_HTML_TEXT_TAGS = frozenset(["h1", "h2", "h3", "p", "li"])
+
+def _html_text_blocks(html: str) -> Iterator[str]:
+    # Raw text of each heading/paragraph/list item, in document order
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        for node in tree.css(",".join(_HTML_DROP_TAGS)):
+            node.decompose()
+        for node in tree.root.traverse() if tree.root else ():
+            if node.tag in _HTML_TEXT_TAGS:
+                yield node.text(separator=" ")
+        return
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(_HTML_DROP_TAGS):
+        tag.decompose()
+    for x in soup.find_all(list(_HTML_TEXT_TAGS)):
+        yield x.get_text(" ")
+
+JD_FETCH_HEADERS = {"User-Agent": "TalentIntelAI/1.0 (+demo)"}
 
-def fetch_jd_text(url: str) -> str:
-    headers = {"User-Agent": "TalentIntelAI/1.0 (+demo)"}
-    r = requests.get(url, headers=headers, timeout=20)
+def _make_http_client():
+    # One pooled client for the process: TLS sessions are reused across JD fetches
+    if httpx is None:
+        return None
+    try:
+        return httpx.AsyncClient(http2=True, timeout=20, headers=JD_FETCH_HEADERS, follow_redirects=True)
+    except ImportError:  # h2 not installed
+        return httpx.AsyncClient(timeout=20, headers=JD_FETCH_HEADERS, follow_redirects=True)
+
+_HTTP = _make_http_client()
+
+async def fetch_jd_text(url: str) -> str:
+    if _HTTP is not None:
+        r = await _HTTP.get(url)
+    else:
+        r = await asyncio.to_thread(requests.get, url, headers=JD_FETCH_HEADERS, timeout=20)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "form"]):
-        tag.decompose()
-    text_nodes = [x.get_text(" ") for x in soup.find_all(["h1", "h2", "h3", "p", "li"])]
-    text = "\n".join([_normalize_text(t) for t in text_nodes if t and _normalize_text(t)])
+    return _html_to_text(r.text)
+
+def _html_to_text(html: str) -> str:
+    text_nodes = (_normalize_text(t) for t in _html_text_blocks(html))
+    # crude dedupe
     uniq, seen = [], set()
-    for p in text.split("\n"):
-        key = hashlib.md5(p.encode("utf-8")).hexdigest()[:10]
-        if key not in seen:
-            seen.add(key); uniq.append(p)
+    for p in text_nodes:
+        if p and p not in seen:
+            seen.add(p); uniq.append(p)
     return "\n".join(uniq)[:20000]
 
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _docx_text(data: bytes) -> str:
+    # Walk the w:t runs of word/document.xml directly instead of building python-docx's object model
+    parts: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as z, z.open("word/document.xml") as doc_xml:
+        for _, el in ET.iterparse(doc_xml):
+            if el.tag == _W_NS + "t":
+                if el.text:
+                    parts.append(el.text)
+            elif el.tag == _W_NS + "p":
+                parts.append("\n")
+                el.clear()
+    return "".join(parts)
+
 def read_resume_bytes(name: str, data: bytes) -> str:
     name = name.lower()
+    if name.endswith(".pdf") and fitz:
+        try:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                return _normalize_text("\n".join(page.get_text() for page in doc))
+        except Exception:
+            pass
     if name.endswith(".pdf") and pdf_extract_text:
         try:
             return _normalize_text(pdf_extract_text(io.BytesIO(data)))
         except Exception:
             pass
+    if name.endswith(".docx"):
+        try:
+            return _normalize_text(_docx_text(data))
+        except Exception:
+            pass
     if (name.endswith(".docx") or name.endswith(".doc")) and docx:
         try:
             d = docx.Document(io.BytesIO(data))
@@ -109,19 +271,60 @@ def read_resume_bytes(name: str, data: bytes) -> str:
     except Exception:
         return ""
 
-def embed_texts(texts: List[str]) -> np.ndarray:
-    vectors: List[List[float]] = []
+async def _embed_batch(batch: List[str]) -> List:
+    async with _embed_sem:
+        if hasattr(emb_model, "get_embeddings_async"):
+            return await emb_model.get_embeddings_async(batch)
+        return await asyncio.to_thread(emb_model.get_embeddings, batch)
+
+async def embed_texts(texts: List[str]) -> np.ndarray:
+    # Per-text cache lookup: only texts never embedded before are sent to Vertex
+    keys = [_cache_key("emb", EMBED_MODEL_NAME, t) for t in texts]
+    found: Dict[str, np.ndarray] = {}
+    pending: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k in found or k in pending:
+            continue
+        v = _emb_memo.get(k)
+        if v is None:
+            v = _cache.get(k)
+        if v is not None:
+            found[k] = _emb_memo[k] = v
+        else:
+            pending[k] = t
+
+    # Fan the batches out concurrently instead of waiting on each round trip in turn
+    pending_keys = list(pending)
     B = 32
-    for i in range(0, len(texts), B):
-        batch = texts[i:i+B]
-        res = emb_model.get_embeddings(batch)
-        for e in res:
-            vectors.append(e.values)
-    return np.array(vectors, dtype=np.float32)
-
-def cosine(a: np.ndarray, b: np.ndarray) -> float:
-    a = a.reshape(1, -1); b = b.reshape(1, -1)
-    return float(cosine_similarity(a, b)[0, 0])
+    batches = [pending_keys[i:i+B] for i in range(0, len(pending_keys), B)]
+    results = await asyncio.gather(*(_embed_batch([pending[k] for k in batch]) for batch in batches))
+    for batch, res in zip(batches, results):
+        # One array conversion per batch instead of one per vector
+        vecs = np.asarray([e.values for e in res], dtype=np.float16)
+        for k, v in zip(batch, vecs):
+            found[k] = _emb_memo[k] = _cache[k] = v
+
+    # Preallocate the output (dim probed from the first vector) and fill it in place
+    dim = len(next(iter(found.values())))
+    vectors = np.empty((len(keys), dim), dtype=np.float32)
+    for i, k in enumerate(keys):
+        vectors[i] = found[k]
+    # L2-normalize once so cosine similarity downstream is a plain dot product;
+    # float16 is plenty for ranking and halves the bytes moved per comparison
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(1e-12)
+    return vectors.astype(np.float16)
+
+def similarities(M: np.ndarray, q: np.ndarray) -> np.ndarray:
+    # Cosine similarity of every (normalized, float16) row of M against q
+    if _CUDA and len(M) >= GPU_MIN_ROWS:
+        # One fp16 tensor-core GEMV on the GPU
+        with torch.inference_mode():
+            Mg = torch.from_numpy(np.ascontiguousarray(M)).to("cuda", non_blocking=True)
+            qg = torch.from_numpy(np.ascontiguousarray(q)).to("cuda")
+            return (Mg @ qg).float().cpu().numpy()
+    if simd is not None:
+        return 1.0 - np.asarray(simd.cdist(M, q.reshape(1, -1), metric="cosine"), dtype=np.float32).ravel()
+    return M.astype(np.float32) @ q.astype(np.float32)
 
 # -------------------------------
 # Prompts
@@ -163,17 +366,52 @@ Return a STRICT JSON like:
 Only output JSON. No markdown. No commentary.
 """
 
+# Resume parse + AI detection in one call (the resume text is sent once, not twice)
+COMBINED_RESUME_PROMPT = """
+You are an expert resume parser and AI-content auditor. Given resume text, return STRICT JSON with exactly two keys:
+{
+  "parsed": {
+    "name": string | null,
+    "titles": string[] (role titles found),
+    "seniority": one of ["intern","junior","mid","senior","lead","manager","director","executive"],
+    "skills": string[] (max 50, lowercase tokens),
+    "experience_bullets": string[] (concise bullets describing actual work done),
+    "education": string[]
+  },
+  "ai": {
+    "ai_likelihood_percent": number (0-100 integer, likelihood the text was generated or heavily edited by an LLM),
+    "rationale": string (short),
+    "flags": string[] (patterns such as generic phrasing, templated bullets, low-specificity)
+  }
+}
+Only output JSON. No markdown. No commentary.
+"""
+
+_JSON_SPAN = re.compile(r"\{.*\}", re.DOTALL)
+
 def gemini_json(system_prompt: str, text: str) -> Dict:
+    # Same prompt + text always parses the same way, so serve repeats from the cache
+    key = _cache_key("gemini", GEMINI_MODEL_NAME, system_prompt, text)
+    cached = _cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    out = _gemini_json_uncached(system_prompt, text)
+    if out:
+        _cache[key] = out
+    return out
+
+def _gemini_json_uncached(system_prompt: str, text: str) -> Dict:
     resp = gemini.generate_content([system_prompt, Part.from_text(text)], safety_settings=None)
     raw = resp.candidates[0].content.parts[0].text if resp and resp.candidates else "{}"
     raw = raw.strip().strip("` ")
     try:
-        return json.loads(raw)
+        return _json_loads(raw)
     except Exception:
-        start = raw.find("{"); end = raw.rfind("}")
-        if start != -1 and end != -1 and end > start:
+        # best-effort repair: parse the span between the first "{" and the last "}"
+        m = _JSON_SPAN.search(raw)
+        if m:
             try:
-                return json.loads(raw[start:end+1])
+                return _json_loads(m.group(0))
             except Exception:
                 pass
     return {}
@@ -186,30 +424,36 @@ SENIORITY_MAP = {
     "manager": 5, "director": 6, "executive": 7
 }
 
-def skills_overlap_score(jd_skills: List[str], res_skills: List[str]) -> float:
+# Perfect if equal; slight penalty if off by 1; larger penalty otherwise.
+# Precomputed once so scoring is a single index (and a NumPy gather in bulk).
+TRAJ_LUT = np.array([
+    [1.0 if i == j else 0.8 if abs(i - j) == 1 else 0.5 if abs(i - j) == 2 else 0.25 for j in range(8)]
+    for i in range(8)
+])
+
+def normalize_skills(skills: List[str]) -> FrozenSet[str]:
+    return frozenset(s.strip().lower() for s in skills)
+
+def skills_overlap_score(jd_skills: FrozenSet[str], res_skills: List[str]) -> float:
+    # jd_skills is normalized once per JD (normalize_skills), not once per resume
     if not jd_skills:
         return 0.0
-    jd = set([s.strip().lower() for s in jd_skills])
-    rs = set([s.strip().lower() for s in res_skills])
-    overlap = jd.intersection(rs)
-    return len(overlap) / max(1, len(jd))
+    rs = {s.strip().lower() for s in res_skills}
+    return len(jd_skills & rs) / len(jd_skills)
 
 def trajectory_alignment(jd_level: str, resume_level: str) -> float:
     a = SENIORITY_MAP.get((jd_level or "").lower(), 2)
     b = SENIORITY_MAP.get((resume_level or "").lower(), 2)
-    diff = abs(a - b)
-    if diff == 0: return 1.0
-    if diff == 1: return 0.8
-    if diff == 2: return 0.5
-    return 0.25
+    return float(TRAJ_LUT[a, b])
 
-def candidate_score(exp_sim: float, skill_overlap: float, traj: float, w: Dict[str, float]) -> float:
+def candidate_scores(exp_sims: np.ndarray, skill_overlaps: np.ndarray, trajs: np.ndarray, w: Dict[str, float]) -> np.ndarray:
+    # Weighted sum for every resume at once, clipped to [0,1] and scaled to 0-100
     score = (
-        w["experience"] * exp_sim +
-        w["skills"] * skill_overlap +
-        w["trajectory"] * traj
+        w["experience"] * np.asarray(exp_sims, dtype=np.float64) +
+        w["skills"] * np.asarray(skill_overlaps, dtype=np.float64) +
+        w["trajectory"] * np.asarray(trajs, dtype=np.float64)
     )
-    return float(max(0.0, min(1.0, score))) * 100.0
+    return np.clip(score, 0.0, 1.0) * 100.0
 
 # -------------------------------
 # FastAPI
@@ -224,52 +468,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def close_http_client():
+    if _HTTP is not None:
+        await _HTTP.aclose()
+
 class JDIn(BaseModel):
     url: str
 
 @app.post("/jd")
-def jd_endpoint(body: JDIn):
-    text = fetch_jd_text(body.url)
-    jd = gemini_json(JD_PROMPT, text) if text else {}
+async def jd_endpoint(body: JDIn):
+    text = await fetch_jd_text(body.url)
+    jd = await gemini_json_async(JD_PROMPT, text) if text else {}
     return {"text": text, "jd": jd}
 
+_gemini_sem = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+async def gemini_json_async(system_prompt: str, text: str) -> Dict:
+    # The Vertex call blocks, so run it on a worker thread and cap in-flight requests
+    async with _gemini_sem:
+        return await asyncio.to_thread(gemini_json, system_prompt, text)
+
+async def parse_resume_and_detect_ai(text: str) -> Tuple[Dict, Dict]:
+    # One Gemini call for both tasks; fall back to the two separate prompts on schema violations
+    out = await gemini_json_async(COMBINED_RESUME_PROMPT, text)
+    parsed = out.get("parsed") if isinstance(out, dict) else None
+    ai = out.get("ai") if isinstance(out, dict) else None
+    if isinstance(parsed, dict) and isinstance(ai, dict):
+        return dict(parsed), dict(ai)
+    parsed, ai = await asyncio.gather(
+        gemini_json_async(RESUME_PROMPT, text),
+        gemini_json_async(AI_DETECT_PROMPT, text),
+    )
+    # Copies: on a miss gemini_json returns the very object it just cached, and callers mutate these
+    return dict(parsed), dict(ai)
+
+async def process_resume(f: UploadFile) -> Dict:
+    buf = await f.read()
+    # Worker thread, not a process pool: forking this module would copy the gRPC/auth state
+    # init_vertex set up at import, and PyMuPDF releases the GIL while it extracts
+    text = await asyncio.to_thread(read_resume_bytes, f.filename, buf)
+    if text:
+        parsed, ai = await parse_resume_and_detect_ai(text)
+    else:
+        parsed, ai = {}, {}
+
+    # Fallback display name
+    base = os.path.splitext(os.path.basename(f.filename))[0]
+    name = (parsed.get("name") or "").strip()
+    display_name = name if name else base
+    parsed["name"] = display_name  # ensure frontend sees a stable name
+
+    # Minimal diagnostics (optional, remove in prod)
+    # print(f"[RESUME] file={f.filename} name={parsed.get('name')} text_len={len(text)} snippet={text[:120].replace('\\n',' ')}")
+
+    return {
+        "file": f.filename,
+        "text": text,
+        "parsed": parsed,
+        "ai": ai,
+    }
+
 @app.post("/resumes")
 async def resumes_endpoint(files: List[UploadFile] = File(...)):
-    out = []
-    for f in files:
-        buf = await f.read()
-        text = read_resume_bytes(f.filename, buf)
-        parsed = gemini_json(RESUME_PROMPT, text) if text else {}
-        ai = gemini_json(AI_DETECT_PROMPT, text) if text else {}
-
-        # Fallback display name
-        base = os.path.splitext(os.path.basename(f.filename))[0]
-        name = (parsed.get("name") or "").strip()
-        display_name = name if name else base
-        parsed["name"] = display_name  # ensure frontend sees a stable name
-
-        # Minimal diagnostics (optional, remove in prod)
-        # print(f"[RESUME] file={f.filename} name={parsed.get('name')} text_len={len(text)} snippet={text[:120].replace('\\n',' ')}")
-
-        out.append({
-            "file": f.filename,
-            "text": text,
-            "parsed": parsed,
-            "ai": ai,
-        })
-    return out
+    # Files are processed concurrently; gather keeps the upload order
+    return await asyncio.gather(*[process_resume(f) for f in files])
 
 class ScoreIn(BaseModel):
     jd: Dict
     resumes: List[Dict]
     weights: Dict[str, float]
+    top_k: Optional[int] = 50  # None returns every resume
 
 
-def extract_skills_from_bullets(bullets: List[str], jd_skills: List[str]) -> List[str]:
+def build_skill_matcher(jd_skills: List[str]):
+    """
+    Aho-Corasick automaton over the lowercased JD skills, built once per JD.
+    Returns None when pyahocorasick isn't installed (or there is nothing to match).
+    """
+    if ahocorasick is None:
+        return None
+    A = ahocorasick.Automaton()
+    for skill in jd_skills:
+        key = skill.lower()
+        if key:
+            A.add_word(key, A.get(key, ()) + (skill,))
+    if len(A) == 0:
+        return None
+    A.make_automaton()
+    return A
+
+def extract_skills_from_bullets(bullets: List[str], jd_skills: List[str], matcher=None) -> List[str]:
     """
     Very simple rule-based extractor: check if JD skills appear in experience bullets text.
+    With a prebuilt matcher (build_skill_matcher) the text is scanned once for all skills.
     """
     bullets_text = " ".join(bullets).lower()
+    if matcher is not None:
+        return list({skill for _, skills in matcher.iter(bullets_text) for skill in skills})
     extracted = []
     for skill in jd_skills:
         if skill.lower() in bullets_text:
@@ -291,47 +587,50 @@ def extract_skills_from_bullets(bullets: List[str], jd_skills: List[str]) -> Lis
 
 
 @app.post("/score")
-def score_endpoint(body: ScoreIn):
+async def score_endpoint(body: ScoreIn):
     jd_struct = body.jd or {}
     jd_resp_text = "\n".join(jd_struct.get("responsibilities", [])) or jd_struct.get("raw_summary") or ""
     if not jd_resp_text and body.jd.get("text"):
         jd_resp_text = body.jd["text"]
-    jd_vec = embed_texts([jd_resp_text])[0] if jd_resp_text else None
 
     jd_req_skills = jd_struct.get("required_skills", [])
+    jd_skill_set = normalize_skills(jd_req_skills)
+    skill_matcher = build_skill_matcher(jd_req_skills)
+
+    # Experience similarity: embed the JD and all resume experience texts in one
+    # batched call, then score every resume with a single matrix-vector product
+    exp_texts = [
+        "\n".join(r.get("parsed", {}).get("experience_bullets", [])) or r.get("text", "")
+        for r in body.resumes
+    ]
+    exp_sims = np.zeros(len(exp_texts), dtype=np.float32)
+    embed_idx = [i for i, t in enumerate(exp_texts) if t]
+    if jd_resp_text and embed_idx:
+        M = await embed_texts([jd_resp_text] + [exp_texts[i] for i in embed_idx])
+        exp_sims[embed_idx] = (similarities(M[1:], M[0]) + 1) / 2.0  # [-1,1] -> [0,1]
 
     rows = []
-    for r in body.resumes:
+    for i, r in enumerate(body.resumes):
         res_struct = r.get("parsed", {})
         ai_struct = r.get("ai", {})
         ai_pct = int(ai_struct.get("ai_likelihood_percent", 0)) if isinstance(ai_struct, dict) else 0
         ai_pct = max(0, min(100, ai_pct))
         validity_pct = 100 - ai_pct
 
-        # Experience text
-        exp_text = "\n".join(res_struct.get("experience_bullets", [])) or r.get("text", "")
-        res_vec = embed_texts([exp_text])[0] if exp_text else None
-
-        # Experience similarity
-        exp_sim = 0.0
-        if jd_vec is not None and res_vec is not None:
-            exp_sim = (cosine(jd_vec, res_vec) + 1) / 2.0  # [-1,1] -> [0,1]
+        exp_sim = float(exp_sims[i])
 
         # ✅ Extract resume skills from experience bullets
-        extracted_skills = extract_skills_from_bullets(res_struct.get("experience_bullets", []), jd_req_skills)
+        extracted_skills = extract_skills_from_bullets(res_struct.get("experience_bullets", []), jd_req_skills, skill_matcher)
 
         # Merge with parsed skills (optional)
         combined_skills = list(set(res_struct.get("skills", [])) | set(extracted_skills))
 
         # Compute skill overlap
-        skill_overlap = skills_overlap_score(jd_req_skills, combined_skills)
+        skill_overlap = skills_overlap_score(jd_skill_set, combined_skills)
 
         # Trajectory alignment
         traj = trajectory_alignment(jd_struct.get("seniority", "mid"), res_struct.get("seniority", "mid"))
 
-        # Final candidate score
-        score = candidate_score(exp_sim, skill_overlap, traj, body.weights)
-
         rows.append({
             "file": r.get("file"),
             "parsed": res_struct,
@@ -341,11 +640,17 @@ def score_endpoint(body: ScoreIn):
             "exp_sim": exp_sim,
             "skill_overlap": skill_overlap,
             "trajectory": traj,
-            "score": score,
         })
 
-    rows = sorted(rows, key=lambda x: x["score"], reverse=True)
-    return rows
+    # Final candidate scores in one vectorized pass over all resumes
+    scores = candidate_scores(exp_sims, [r["skill_overlap"] for r in rows], [r["trajectory"] for r in rows], body.weights)
+    for r, score in zip(rows, scores):
+        r["score"] = float(score)
+
+    # Only the top-K are shown; nlargest is O(N log K) and already descending
+    if body.top_k is None:
+        return sorted(rows, key=lambda x: x["score"], reverse=True)
+    return heapq.nlargest(body.top_k, rows, key=lambda x: x["score"])
 
 
 # @app.post("/score")
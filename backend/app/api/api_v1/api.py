@@ -1,7 +1,25 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from bson import ObjectId
+import orjson
 from .endpoints import resumes, job_descriptions, scores
 
-api_router = APIRouter()
+def _orjson_default(o):
+    # orjson handles datetime natively; Mongo ObjectIds are the only other type in our docs
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError
+
+class ORJSONResponse(_ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+# orjson encodes responses in C instead of the stdlib json encoder
+api_router = APIRouter(default_response_class=ORJSONResponse)
 
 api_router.include_router(resumes.router, prefix="/resumes", tags=["resumes"])
 api_router.include_router(job_descriptions.router, prefix="/job-descriptions", tags=["job-descriptions"])
@@ -1,29 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Request
 from typing import List, Optional
-import requests
+import httpx
 from bs4 import BeautifulSoup
+import asyncio
 import hashlib
+import logging
+import re
 from urllib.parse import urlparse
 from bson import ObjectId
-import os
-from dotenv import load_dotenv
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part
-import json
+from vertexai.generative_models import Part
+from pymongo.errors import DuplicateKeyError
+from cachetools import TTLCache
 
 from app.models.base import JobDescription
 from app.db.mongodb import MongoDB, get_db
 from app.core.config import settings
+from app.core.gemini import compact_prompt, generate_json_async
+
+try:
+    # Lexbor engine: C HTML parser, much faster than bs4 + html.parser (the only one left in selectolax >= 1.0)
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except Exception:
+    HTML_PARSER = "html.parser"
 
 router = APIRouter()
+log = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Per-worker cache of stored JDs by url_hash so hot URLs skip the Mongo probe. Advisory only:
+# the unique url_hash index is the source of truth; the TTL lets re-posted pages age out.
+_URL_CACHE = TTLCache(maxsize=10_000, ttl=3600)
 
-# Vertex AI config
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
-GEMINI_MODEL_NAME = "gemini-2.0-flash"
+# Splits page text into blocks on newlines or runs of 2+ spaces
+_BLOCK_SPLIT = re.compile(r"\s*(?:\n|  )\s*")
 
 # JD prompt (same as app.py)
 JD_PROMPT = """
@@ -38,54 +52,50 @@ You are an expert HR analyst. Given a Job Description (JD) as plain text, return
 }
 Only output JSON. No markdown. No commentary.
 """
+JD_PROMPT = compact_prompt(JD_PROMPT)
+JD_PROMPT_PART = Part.from_text(JD_PROMPT)  # built once, reused by every call
+
+def html_to_text(html: str) -> str:
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        # Remove script and style elements
+        tree.strip_tags(["script", "style"])
+        text = tree.root.text() if tree.root else ""
+    else:
+        soup = BeautifulSoup(html, HTML_PARSER)
+        for script in soup(["script", "style"]):
+            script.extract()
+        text = soup.get_text()
+    # One compiled split instead of per-line strip/split generator pipelines
+    return '\n'.join(block for block in (b.strip() for b in _BLOCK_SPLIT.split(text)) if block)
+
+def drop_task(task: asyncio.Task):
+    # Cancel a task whose result is no longer needed; if it already failed, retrieve the
+    # exception so asyncio doesn't log "Task exception was never retrieved"
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
-async def fetch_job_description(url: str) -> str:
+async def fetch_job_description(url: str, http: httpx.AsyncClient) -> str:
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = await http.get(url, headers=headers)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.extract()
-            
-        # Get text
-        text = soup.get_text()
-        
-        # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        text = html_to_text(response.text)
         
         return text
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch job description: {str(e)}")
 
-def parse_jd_with_gemini(jd_text: str) -> dict:
-    # Initialize Vertex AI and Gemini model
-    print("Initializing Vertex AI...", PROJECT_ID, LOCATION)
-    vertexai.init(project=PROJECT_ID, location=LOCATION)
-    gemini = GenerativeModel(GEMINI_MODEL_NAME)
-    resp = gemini.generate_content([JD_PROMPT, Part.from_text(jd_text)], safety_settings=None)
-    raw = resp.candidates[0].content.parts[0].text if resp and resp.candidates else "{}"
-    raw = raw.strip().strip("` ")
-    try:
-        return json.loads(raw)
-    except Exception:
-        start = raw.find("{"); end = raw.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(raw[start:end+1])
-            except Exception:
-                pass
-    return {}
+async def parse_jd_with_gemini(jd_text: str) -> dict:
+    log.debug("Parsing JD with Gemini (%d chars)", len(jd_text))
+    return await generate_json_async([JD_PROMPT_PART, Part.from_text(jd_text)], safety_settings=None)
 
 @router.post("", response_model=JobDescription)
 async def create_job_description(
+    request: Request,
     url: str = Body(..., embed=True),
     db: MongoDB = Depends(get_db)
 ):
@@ -97,30 +107,47 @@ async def create_job_description(
     # Generate URL hash
     url_hash = hashlib.sha256(url.encode()).hexdigest()
     
+    if (cached := _URL_CACHE.get(url_hash)) is not None:
+        return cached
+    
+    # Start fetching the page while Mongo is probed; the fetch is dropped if the JD already exists
+    fetch = asyncio.create_task(fetch_job_description(url, request.app.state.http))
+    
     # Check if JD already exists
     collection = db.get_collection("job_descriptions")
-    existing = await collection.find_one({"url_hash": url_hash})
+    try:
+        existing = await collection.find_one({"url_hash": url_hash})
+    except Exception:
+        drop_task(fetch)
+        raise
     if existing:
-        return db.serialize_doc(existing)
+        drop_task(fetch)
+        _URL_CACHE[url_hash] = db.serialize_doc(existing)
+        return _URL_CACHE[url_hash]
     
     # Fetch job description
     try:
-        content = await fetch_job_description(url)
+        content = await fetch
         # Parse JD using Gemini
-        parsed_data = parse_jd_with_gemini(content)
+        parsed_data = await parse_jd_with_gemini(content)
         # console.log("Parsed JD Data:", parsed_data)
         # Create job description document
         jd_data = {
             "url": url,
             "content": content,
+            "tokens": sorted(set(content.lower().split())),  # for word-overlap scoring
             "url_hash": url_hash,
             "parsed_data": parsed_data
         }
-        # Save to database
-        result = await collection.insert_one(jd_data)
+        # Save to database (a concurrent request for the same URL may have won the race)
+        try:
+            result = await collection.insert_one(jd_data)
+        except DuplicateKeyError:
+            return db.serialize_doc(await collection.find_one({"url_hash": url_hash}))
         jd_data["id"] = str(result.inserted_id)
         serialized_jd_data = db.serialize_doc(jd_data)
         jd = JobDescription(**serialized_jd_data)
+        _URL_CACHE[url_hash] = jd
     
         return jd
         
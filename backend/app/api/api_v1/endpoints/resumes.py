@@ -1,25 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
-from typing import List
-import os
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, BackgroundTasks, Request, Response
+from typing import List, Set, Tuple, Union
+from datetime import timedelta
+import asyncio
 import hashlib
-from datetime import datetime
-import json
-from dotenv import load_dotenv
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part
+import logging
+import mmap
+import tempfile
+import uuid
+from bson import ObjectId
+from vertexai.generative_models import Part
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from cachetools import LRUCache
 
-from app.models.base import Resume
+from app.models.base import Resume, utcnow
 from app.db.mongodb import MongoDB, get_db
 from app.core.config import settings
+from app.core.gemini import GEMINI_MODEL_NAME, compact_prompt, generate_json_async, get_batch_client, parse_json_text
+
+try:
+    import pypdfium2 as pdfium  # C-backed PDF text extraction
+except Exception:
+    pdfium = None
+
+try:
+    import docx
+except Exception:
+    docx = None
 
 router = APIRouter()
+log = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Process-local cache of stored resumes keyed by file_hash: repeat uploads skip Mongo and Gemini.
+# Mongo (unique file_hash index) stays the source of truth; pending Batch API parses aren't cached.
+_PARSED = LRUCache(maxsize=4096)
 
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
-GEMINI_MODEL_NAME = "gemini-2.0-flash"
+def cache_resume(file_hash: str, resume):
+    status_ = resume.get("parse_status") if isinstance(resume, dict) else resume.parse_status
+    if status_ != "pending":
+        _PARSED[file_hash] = resume
 
 RESUME_PROMPT = """
 You are an expert resume parser. Extract structured data from the provided resume TEXT with best-effort inference.
@@ -51,90 +69,315 @@ experience_bullets=["built microservices in go on kubernetes","led team of 4 eng
 
 Return ONLY the JSON object.
 """
+RESUME_PROMPT = compact_prompt(RESUME_PROMPT)
+RESUME_PROMPT_PART = Part.from_text(RESUME_PROMPT)  # built once, reused by every call
+
+async def parse_resume_with_gemini(resume: Union[str, Part]) -> dict:
+    part = resume if isinstance(resume, Part) else Part.from_text(resume)
+    return await generate_json_async([RESUME_PROMPT_PART, part], safety_settings=None)
+
+# Gemini Batch API: bulk ingestion at half the per-token cost, results arrive asynchronously
+BATCH_POLL_SECONDS = 30
+BATCH_MAX_BACKOFF_SECONDS = 600
+BATCH_LEASE_SECONDS = 5 * BATCH_POLL_SECONDS  # a live poller renews its lease every poll
+BATCH_WORKER_ID = uuid.uuid4().hex  # identifies this process as a lease holder
+BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
 
-def parse_resume_with_gemini(resume_text: str) -> dict:
-    vertexai.init(project=PROJECT_ID, location=LOCATION)
-    gemini = GenerativeModel(GEMINI_MODEL_NAME)
-    resp = gemini.generate_content([RESUME_PROMPT, Part.from_text(resume_text)], safety_settings=None)
-    raw = resp.candidates[0].content.parts[0].text if resp and resp.candidates else "{}"
-    raw = raw.strip().strip("` ")
+def batch_part(resume: Union[str, Part]) -> dict:
+    if isinstance(resume, Part):
+        return {"inline_data": {"mime_type": resume.inline_data.mime_type, "data": resume.inline_data.data}}
+    return {"text": resume}
+
+async def submit_resume_batch(resumes: List[Union[str, Part]]) -> str:
+    client = get_batch_client()
+    inline_requests = [
+        {"contents": [{"parts": [{"text": RESUME_PROMPT}, batch_part(resume)], "role": "user"}]}
+        for resume in resumes
+    ]
+    job = await client.aio.batches.create(
+        model=f"models/{GEMINI_MODEL_NAME}",
+        src=inline_requests,
+        config={"display_name": f"resume-parse-{utcnow():%Y%m%d%H%M%S}"},
+    )
+    return job.name
+
+async def claim_batch_job(job_name: str) -> bool:
+    # Lease on the job in batch_jobs: with several workers (and a restart re-queuing every pending
+    # job in each of them) only the lease holder polls the API and writes results back
+    now = utcnow()
     try:
-        return json.loads(raw)
-    except Exception:
-        start = raw.find("{"); end = raw.rfind("}")
-        if start != -1 and end != -1 and end > start:
+        await MongoDB.get_collection("batch_jobs").find_one_and_update(
+            {"_id": job_name, "$or": [{"owner": BATCH_WORKER_ID}, {"lease_until": {"$lt": now}}]},
+            {"$set": {"owner": BATCH_WORKER_ID, "lease_until": now + timedelta(seconds=BATCH_LEASE_SECONDS)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False  # another worker holds an unexpired lease
+    return True
+
+async def collect_resume_batch(job_name: str, file_hashes: List[str], collection):
+    # Poll until the job finishes, then write each parse back onto its pending resume.
+    # Workers without the lease keep waiting, so one of them takes over if the holder dies.
+    client = get_batch_client()
+    delay = BATCH_POLL_SECONDS
+    while True:
+        try:
+            if not await collection.find_one({"batch_job": job_name, "parse_status": "pending"}, projection={"_id": 1}):
+                return  # already collected, possibly by another worker
+            if await claim_batch_job(job_name):
+                job = await client.aio.batches.get(name=job_name)
+                if job.state.name in BATCH_DONE_STATES:
+                    break
+            delay = BATCH_POLL_SECONDS
+        except Exception:
+            delay = min(delay * 2, BATCH_MAX_BACKOFF_SECONDS)
+            log.exception("Polling Batch API job %s failed, retrying in %ds", job_name, delay)
+        await asyncio.sleep(delay)
+    responses = []
+    if job.state.name == "JOB_STATE_SUCCEEDED" and job.dest and job.dest.inlined_responses:
+        responses = job.dest.inlined_responses
+    for i, file_hash in enumerate(file_hashes):
+        item = responses[i] if i < len(responses) else None
+        if item is not None and item.response is not None:
+            update = {"parsed_data": parse_json_text(item.response.text or "{}"), "parse_status": "done"}
+        else:
+            update = {"parse_status": "failed"}
+        update["updated_at"] = utcnow()
+        # Only pending resumes are written, so collecting a job twice is harmless
+        await collection.update_one(
+            {"file_hash": file_hash, "batch_job": job_name, "parse_status": "pending"}, {"$set": update}
+        )
+
+def start_batch_collector(tasks: Set[asyncio.Task], job_name: str, file_hashes: List[str], collection) -> asyncio.Task:
+    # Polling can outlive any request by hours, so it runs as an app-level task rather than a
+    # BackgroundTask; the set keeps a reference until it finishes
+    task = asyncio.create_task(collect_resume_batch(job_name, file_hashes, collection))
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+async def resume_pending_batches(tasks: Set[asyncio.Task], collection):
+    # Polling lives in this process, so a restart drops it; the job name and each resume's
+    # position in it are stored on the documents, so pick up every job still pending
+    if get_batch_client() is None:
+        return
+    for job_name in await collection.distinct("batch_job", {"parse_status": "pending"}):
+        if not job_name:
+            continue
+        cursor = collection.find({"batch_job": job_name}, projection={"file_hash": 1})
+        file_hashes = [doc["file_hash"] async for doc in cursor.sort([("batch_index", 1), ("_id", 1)])]
+        log.info("Resuming Batch API job %s (%d resumes)", job_name, len(file_hashes))
+        start_batch_collector(tasks, job_name, file_hashes, collection)
+
+UPLOAD_CHUNK_SIZE = 1 << 20
+SPOOL_MAX_MEMORY = 8 << 20  # larger uploads roll over to a temp file
+
+async def spool_upload(file: UploadFile) -> Tuple[tempfile.SpooledTemporaryFile, str, int]:
+    # Hash while copying in 1 MiB chunks to a spool, so the upload is never held as one big bytes.
+    # sha256 is kept so hashes still match resumes already stored.
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    h = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        h.update(chunk)
+        spool.write(chunk)
+        size += len(chunk)
+    return spool, h.hexdigest(), size
+
+def decode_spooled(spool: tempfile.SpooledTemporaryFile, size: int) -> str:
+    spool.seek(0)
+    if size > SPOOL_MAX_MEMORY:
+        # Rolled over to disk: decode straight from a read-only mapping, no intermediate bytes copy
+        with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return str(mm, 'utf-8', errors='ignore')
+    return spool.read().decode('utf-8', errors='ignore')
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+def extract_resume_input(spool: tempfile.SpooledTemporaryFile, size: int, content_type: str) -> Union[str, Part]:
+    # Extract text locally for PDF/DOCX instead of UTF-8 decoding the binary; if that isn't
+    # possible, hand Gemini the file itself so it parses the document natively
+    spool.seek(0)
+    if content_type == PDF_MIME:
+        data = spool.read()
+        if pdfium is not None:
             try:
-                return json.loads(raw[start:end+1])
+                pdf = pdfium.PdfDocument(data)
+                try:
+                    text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+                finally:
+                    pdf.close()
+                # Scanned/image-only PDFs have no text layer; those go to Gemini as the file below
+                if text.strip():
+                    return text
             except Exception:
                 pass
-    return {}
+        return Part.from_data(data=data, mime_type=PDF_MIME)
+    if content_type == DOCX_MIME and docx is not None:
+        try:
+            return "\n".join(p.text for p in docx.Document(spool).paragraphs)
+        except Exception:
+            spool.seek(0)
+    if content_type and content_type.startswith("image/"):
+        return Part.from_data(data=spool.read(), mime_type=content_type)
+    return decode_spooled(spool, size)
+
+def resume_text_of(resume: Union[str, Part]) -> str:
+    return resume if isinstance(resume, str) else ""
+
+def resume_content(text: str) -> dict:
+    # Lowercased unique tokens are stored once at ingest so scoring doesn't re-tokenize per request
+    return {"text": text, "tokens": sorted(set(text.lower().split()))}
+
+async def parse_and_update(file_hash: str, resume_input: Union[str, Part], collection):
+    # Background half of upload_resume: run Gemini, then fill in the stored document
+    try:
+        update = {"parsed_data": await parse_resume_with_gemini(resume_input), "parse_status": "done"}
+    except Exception:
+        log.exception("Resume parse failed for %s", file_hash)
+        update = {"parse_status": "failed"}
+    update["updated_at"] = utcnow()
+    await collection.update_one({"file_hash": file_hash}, {"$set": update})
 
 @router.post("/upload", response_model=Resume)
 async def upload_resume(
+    background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
+    wait: bool = False,
     db: MongoDB = Depends(get_db)
 ):
-    # Read file content
-    content = await file.read()
-    
-    # Generate file hash
-    file_hash = hashlib.sha256(content).hexdigest()
-    
-    # Check if resume already exists
-    collection = db.get_collection("resumes")
-    existing = await collection.find_one({"file_hash": file_hash})
-    if existing:
-        return db.serialize_doc(existing)
-    
-    # Parse resume using Gemini
-    resume_text = content.decode('utf-8', errors='ignore')
-    parsed_data = parse_resume_with_gemini(resume_text)
+    # Spool file content and generate file hash in one pass
+    spool, file_hash, file_size = await spool_upload(file)
+    try:
+        cached = _PARSED.get(file_hash)
+        if cached is not None:
+            return cached
+        
+        # Check if resume already exists
+        collection = db.get_collection("resumes")
+        existing = await collection.find_one({"file_hash": file_hash})
+        if existing:
+            existing = db.serialize_doc(existing)
+            cache_resume(file_hash, existing)
+            return existing
+        
+        # Only extract on a miss
+        resume_input = await asyncio.to_thread(extract_resume_input, spool, file_size, file.content_type)
+        # Build from the spool, reusing the hash computed while it was received
+        resume = Resume.create_from_stream(
+            spool, file.filename, resume_content(resume_text_of(resume_input)),
+            file_type=file.content_type, file_hash=file_hash,
+        )
+    finally:
+        spool.close()
     
-    # Build dict for MongoDB
-    resume_data = {
-        "file_hash": file_hash,
-        "file_name": file.filename,
-        "file_size": len(content),
-        "file_type": file.content_type,
-        "content": {"text": resume_text},
-        "parsed_data": parsed_data
-    }
-    # Save to database
-    result = await collection.insert_one(resume_data)
-    # Remove _id if present, set id as string
-    resume_data.pop("_id", None)
-    resume_data["id"] = str(result.inserted_id)
-    resume = Resume(**resume_data)
+    # Parse resume using Gemini; by default this happens after the response (202 + parse_status)
+    if wait:
+        resume.parsed_data = await parse_resume_with_gemini(resume_input)
+    else:
+        resume.parse_status = "pending"
+    # Save to database (a concurrent upload of the same file may have won the race)
+    try:
+        result = await collection.insert_one(resume.model_dump(by_alias=True, exclude={"id"}))
+    except DuplicateKeyError:
+        return db.serialize_doc(await collection.find_one({"file_hash": file_hash}))
+    resume.id = str(result.inserted_id)
+    cache_resume(file_hash, resume)
+    if not wait:
+        background_tasks.add_task(parse_and_update, file_hash, resume_input, collection)
+        response.status_code = status.HTTP_202_ACCEPTED
     return resume
 
 @router.post("/upload/batch", response_model=List[Resume])
 async def upload_resumes_batch(
+    request: Request,
+    response: Response,
     files: List[UploadFile] = File(...),
+    use_batch_api: bool = False,
     db: MongoDB = Depends(get_db)
 ):
     collection = db.get_collection("resumes")
-    results = []
-    for file in files:
-        content = await file.read()
-        file_hash = hashlib.sha256(content).hexdigest()
-        existing = await collection.find_one({"file_hash": file_hash})
-        if existing:
-            results.append(db.serialize_doc(existing))
-            continue
-        resume_text = content.decode('utf-8', errors='ignore')
-        parsed_data = parse_resume_with_gemini(resume_text)
-        resume_data = {
+    uploads = [await spool_upload(file) for file in files]
+    hashes = [file_hash for _, file_hash, _ in uploads]
+
+    try:
+        # Dedup check: process-local cache first, then the rest of the batch in one indexed round trip
+        found = {h: _PARSED[h] for h in set(hashes) if h in _PARSED}
+        misses = [h for h in set(hashes) if h not in found]
+        if misses:
+            async for doc in collection.find({"file_hash": {"$in": misses}}):
+                found[doc["file_hash"]] = doc
+        existing_docs = [found.get(h) for h in hashes]
+
+        # Extract only the new resumes; identical files in one batch share a parse
+        new_idx = {}
+        for i, (file_hash, existing) in enumerate(zip(hashes, existing_docs)):
+            if not existing and file_hash not in new_idx:
+                new_idx[file_hash] = i
+        extracted = await asyncio.gather(*(
+            asyncio.to_thread(extract_resume_input, uploads[i][0], uploads[i][2], files[i].content_type)
+            for i in new_idx.values()
+        ))
+        inputs = dict(zip(new_idx, extracted))
+        log.debug("Batch upload: %d files, %d new", len(files), len(new_idx))
+    finally:
+        for spool, _, _ in uploads:
+            spool.close()
+
+    # Opt-in: hand new resumes to the Batch API and store them as pending (202)
+    batch_job = None
+    if use_batch_api and new_idx and get_batch_client() is not None:
+        batch_job = await submit_resume_batch([inputs[h] for h in new_idx])
+        parsed = [None] * len(new_idx)
+    else:
+        parsed = await asyncio.gather(*(parse_resume_with_gemini(inputs[h]) for h in new_idx))
+
+    new_docs = {}
+    for (file_hash, i), parsed_data in zip(new_idx.items(), parsed):
+        file = files[i]
+        new_docs[file_hash] = {
             "file_hash": file_hash,
             "file_name": file.filename,
-            "file_size": len(content),
+            "file_size": uploads[i][2],
             "file_type": file.content_type,
-            "content": {"text": resume_text},
+            "content": resume_content(resume_text_of(inputs[file_hash])),
             "parsed_data": parsed_data
         }
-        result = await collection.insert_one(resume_data)
-        resume_data.pop("_id", None)
-        resume_data["id"] = str(result.inserted_id)
-        resume = Resume(**resume_data)
+        if batch_job:
+            new_docs[file_hash].update({"parse_status": "pending", "batch_job": batch_job, "batch_index": len(new_docs) - 1})
+
+    # All new resumes in one round trip; ordered=False so one duplicate doesn't stop the rest
+    docs = list(new_docs.values())
+    raced = set()
+    if docs:
+        try:
+            await collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != 11000 for err in errors):
+                raise
+            # A concurrent upload stored these first; return its documents instead
+            raced = {docs[err["index"]]["file_hash"] for err in errors}
+    for resume_data in docs:
+        # insert_many sets _id on each document it was given
+        resume_data["id"] = str(resume_data.pop("_id", ""))
+    if raced:
+        async for doc in collection.find({"file_hash": {"$in": list(raced)}}):
+            found[doc["file_hash"]] = doc
+        existing_docs = [found.get(h) for h in hashes]
+    if batch_job:
+        start_batch_collector(request.app.state.batch_tasks, batch_job, list(new_docs), collection)
+        response.status_code = status.HTTP_202_ACCEPTED
+
+    results = []
+    for file_hash, existing in zip(hashes, existing_docs):
+        if existing:
+            resume = existing if isinstance(existing, Resume) else db.serialize_doc(existing)
+        else:
+            resume = Resume(**new_docs[file_hash])
+        cache_resume(file_hash, resume)
         results.append(resume)
     return results
 
@@ -149,6 +392,26 @@ async def get_resume(
         raise HTTPException(status_code=404, detail="Resume not found")
     return db.serialize_doc(resume)
 
+@router.get("/{resume_id}/parsed")
+async def get_resume_parsed(
+    resume_id: str,
+    db: MongoDB = Depends(get_db)
+):
+    # Lightweight polling endpoint for uploads that are still being parsed
+    try:
+        object_id = ObjectId(resume_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid resume ID format")
+    collection = db.get_collection("resumes")
+    resume = await collection.find_one({"_id": object_id}, projection={"parse_status": 1, "parsed_data": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return {
+        "id": str(resume["_id"]),
+        "parse_status": resume.get("parse_status") or "done",
+        "parsed_data": resume.get("parsed_data"),
+    }
+
 @router.get("/", response_model=List[Resume])
 async def list_resumes(
     skip: int = 0,
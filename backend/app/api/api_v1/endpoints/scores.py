@@ -1,20 +1,32 @@
 from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File
 from typing import List, Dict, Any, Optional
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import math
+import asyncio
 from app.models.base import Score
 from app.db.mongodb import MongoDB, get_db
 from app.core.config import settings
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part
-import os
+from app.core.gemini import generate_content_async, parse_json_text
+from app.services.scoring import (
+    build_skill_matcher,
+    candidate_scores,
+    exp_similarities,
+    extract_skills_from_bullets,
+    skills_overlap_score,
+    trajectory_alignment,
+    weights_signature,
+)
+from vertexai.generative_models import Part
 import hashlib
-import json
+import re
 from bson import ObjectId
-from rapidfuzz import fuzz
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 router = APIRouter()
 
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}")  # 24-hex-char ObjectId string
+
 async def calculate_similarity(
     resume_embedding: List[float],
     jd_embedding: List[float]
@@ -23,12 +35,11 @@ async def calculate_similarity(
     if not resume_embedding or not jd_embedding:
         return 0.0
     
-    # Ensure embeddings are 2D arrays for sklearn
-    resume_array = np.array(resume_embedding).reshape(1, -1)
-    jd_array = np.array(jd_embedding).reshape(1, -1)
-    
-    # Calculate cosine similarity
-    similarity = cosine_similarity(resume_array, jd_array)[0][0]
+    # Single pair: plain 1-D dot products, no 2-D reshaping or per-call input validation
+    a = np.asarray(resume_embedding, dtype=np.float32)
+    b = np.asarray(jd_embedding, dtype=np.float32)
+    denom = math.sqrt(float(np.vdot(a, a)) * float(np.vdot(b, b)))
+    similarity = 0.0 if denom == 0 else float(np.dot(a, b)) / denom
     
     # Convert to 0-100 scale
     return max(0.0, min(100.0, (similarity + 1) * 50))
@@ -75,9 +86,9 @@ async def calculate_score(
     resume_text = resume.get("content", {}).get("text", "")
     jd_text = jd.get("content", "")
     
-    # Simple word overlap as a placeholder
-    resume_words = set(resume_text.lower().split())
-    jd_words = set(jd_text.lower().split())
+    # Simple word overlap as a placeholder (token sets are stored at ingest; older docs fall back to splitting)
+    resume_words = set(resume.get("content", {}).get("tokens") or resume_text.lower().split())
+    jd_words = set(jd.get("tokens") or jd_text.lower().split())
     
     if not jd_words:
         similarity_score = 0.0
@@ -105,7 +116,7 @@ async def calculate_score(
     )
     
     # Save to database
-    result = await collection.insert_one(score.dict(by_alias=True, exclude={"id"}))
+    result = await collection.insert_one(score.model_dump(by_alias=True, exclude={"id"}))
     score.id = str(result.inserted_id)
     
     return score
@@ -178,77 +189,11 @@ Return a STRICT JSON like:
 Only output JSON. No markdown. No commentary.
 """
 
-def gemini_json(gemini: GenerativeModel, system_prompt: str, text: str) -> dict:
-    resp = gemini.generate_content([system_prompt, Part.from_text(text)], safety_settings=None)
+async def gemini_json(system_prompt: str, text: str) -> dict:
+    # Shared, already-initialized model from app.core.gemini (bounded by its concurrency guard)
+    resp = await generate_content_async([system_prompt, Part.from_text(text)], safety_settings=None)
     raw = resp.candidates[0].content.parts[0].text if resp and resp.candidates else "{}"
-    raw = raw.strip().strip("` ")
-    try:
-        return json.loads(raw)
-    except Exception:
-        start = raw.find("{"); end = raw.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(raw[start:end+1])
-            except Exception:
-                pass
-    return {}
-
-def skills_overlap_score(jd_skills, res_skills):
-    """
-    Fuzzy skill overlap: for each JD skill, find the best fuzzy match in resume skills.
-    Give partial credit for similar skills.
-    """
-    if not jd_skills or not res_skills:
-        return 0.0
-    jd = [s.strip().lower() for s in jd_skills]
-    rs = [s.strip().lower() for s in res_skills]
-    total = 0.0
-    for jd_skill in jd:
-        best = 0.0
-        for res_skill in rs:
-            # Use both ratio and partial_ratio for better fuzzy matching
-            ratio = fuzz.ratio(jd_skill, res_skill) / 100.0
-            partial = fuzz.partial_ratio(jd_skill, res_skill) / 100.0
-            score = max(ratio, partial)
-            if score > best:
-                best = score
-        total += best
-    return total / max(1, len(jd))
-
-SENIORITY_MAP = {
-    "intern": 0, "junior": 1, "mid": 2, "senior": 3, "lead": 4,
-    "manager": 5, "director": 6, "executive": 7
-}
-def trajectory_alignment(jd_level, resume_level):
-    a = SENIORITY_MAP.get((jd_level or "").lower(), 2)
-    b = SENIORITY_MAP.get((resume_level or "").lower(), 2)
-    diff = abs(a - b)
-    if diff == 0:
-        return 1.0
-    if diff == 1:
-        return 0.8
-    if diff == 2:
-        return 0.5
-    return 0.25
-
-def candidate_score(exp_sim, skill_overlap, traj, w):
-    score = (
-        w["experience"] * exp_sim +
-        w["skills"] * skill_overlap +
-        w["trajectory"] * traj
-    )
-    return float(max(0.0, min(1.0, score))) * 100.0
-
-def extract_skills_from_bullets(bullets: List[str], jd_skills: List[str]) -> List[str]:
-    """
-    Very simple rule-based extractor: check if JD skills appear in experience bullets text.
-    """
-    bullets_text = " ".join(bullets).lower()
-    extracted = []
-    for skill in jd_skills:
-        if skill.lower() in bullets_text:
-            extracted.append(skill)
-    return list(set(extracted))
+    return parse_json_text(raw)
 
 @router.post("/batch-score", response_model=List[dict])
 async def batch_score_resumes(
@@ -257,6 +202,12 @@ async def batch_score_resumes(
     weights: Optional[Dict[str, float]] = Body(None),
     db: MongoDB = Depends(get_db)
 ):
+    # Reject malformed resume ids up front, before any DB work
+    bad = [r for r in resume_ids if not _OID_RE.fullmatch(r)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid resume ID format: {bad[:3]}")
+    oids = [ObjectId(resume_id) for resume_id in resume_ids]
+
     # Load JD from DB
     jd_collection = db.get_collection("job_descriptions")
     try:
@@ -272,58 +223,61 @@ async def batch_score_resumes(
     jd_resp_text = "\n".join(jd_struct.get("responsibilities", [])) if jd_struct else jd_text
     if not jd_resp_text:
         jd_resp_text = jd_text
+    skill_matcher = build_skill_matcher(jd_req_skills)
         
     # print("JD Text:", jd_resp_text)
 
-    # Improved embedding: use fuzzy token set ratio for experience similarity
-    def exp_similarity(jd_text, res_text):
-        if not jd_text or not res_text:
-            return 0.0
-        # Combine token_set_ratio and partial_ratio for a more forgiving similarity
-        tsr = fuzz.token_set_ratio(jd_text, res_text)
-        pr = fuzz.partial_ratio(jd_text, res_text)
-        avg = (tsr + pr) / 2
-        # Non-linear scaling to boost mid-range scores
-        scaled = (avg / 100.0) ** 0.5  # sqrt scaling
-        # Apply a floor so even weak matches get a small score
-        return max(0.15, scaled)
-
     # Use provided weights or default
     if not weights:
         weights = {"experience": 0.5, "skills": 0.35, "trajectory": 0.15}
-
-    # Stable hash for weights to key cache; round values to avoid float noise
-    def weights_signature(w: Dict[str, float]) -> str:
-        items = sorted((k, round(float(v), 6)) for k, v in w.items())
-        return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
     w_sig = weights_signature(weights)
-
-    # Initialize Gemini for AI detection
-    PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-    LOCATION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
-    GEMINI_MODEL_NAME = "gemini-2.0-flash"
-    vertexai.init(project=PROJECT_ID, location=LOCATION)
-    gemini = GenerativeModel(GEMINI_MODEL_NAME)
+    # Resolved once as plain floats; reused for scoring and for every stored score doc
+    we, ws, wt = (float(weights.get(k, 0.0)) for k in ("experience", "skills", "trajectory"))
 
     resumes_collection = db.get_collection("resumes")
     scores_collection = db.get_collection("scores")
+
+    # Cached scores for this JD and weights, one query for all requested resumes
+    cached = {
+        doc["resume_id"]: doc
+        async for doc in scores_collection.find({
+            "jd_id": jd_id,
+            "weights_hash": w_sig,
+            "resume_id": {"$in": resume_ids},
+        })
+    }
+
+    # Requested resumes in one round trip per path, projected to the fields each path reads:
+    # cache hits only display metadata, misses also need the text
+    hit_oids = [oid for rid, oid in zip(resume_ids, oids) if rid in cached]
+    miss_oids = [oid for rid, oid in zip(resume_ids, oids) if rid not in cached]
+    resumes = {}
+    if hit_oids:
+        async for r in resumes_collection.find(
+            {"_id": {"$in": hit_oids}}, projection={"file_name": 1, "parsed_data": 1}
+        ):
+            resumes[str(r["_id"])] = r
+    if miss_oids:
+        async for r in resumes_collection.find(
+            {"_id": {"$in": miss_oids}},
+            projection={"file_name": 1, "parsed_data": 1, "parse_status": 1, "content.text": 1},
+        ):
+            resumes[str(r["_id"])] = r
+
     rows = []
+    to_process = []
+    skipped = []
     for resume_id in resume_ids:
-        object_id = ObjectId(resume_id)
-        resume = await resumes_collection.find_one({"_id": object_id})
+        resume = resumes.get(resume_id)
         if not resume:
             continue
         # Check cache: if a score for this JD and resume already exists, reuse it
-        existing = await scores_collection.find_one({
-            "resume_id": resume_id,
-            "jd_id": jd_id,
-            "weights_hash": w_sig,
-        })
+        existing = cached.get(resume_id)
         if existing:
             rows.append({
                 "resume_id": resume_id,
                 "file": resume.get("file_name", ""),
-                "parsed": resume.get("parsed_data", {}),
+                "parsed": resume.get("parsed_data") or {},
                 "ai": existing.get("ai", {}),
                 "ai_pct": existing.get("ai_pct", 0),
                 "validity_pct": existing.get("validity_pct", 100),
@@ -333,34 +287,79 @@ async def batch_score_resumes(
                 "score": existing.get("overall_score", existing.get("score", 0.0)),
             })
             continue
-        res_struct = resume.get("parsed_data", {})
-        res_text = resume.get("content", {}).get("text", "")
-        # AI detection via Gemini (like app.py)
-        ai_struct = gemini_json(gemini, AI_DETECT_PROMPT, res_text)
+        # Uploads still being parsed (or whose parse failed) have no parsed_data yet; scoring
+        # them now would cache a score computed without a parse, so report them unscored instead
+        if resume.get("parse_status") in ("pending", "failed"):
+            skipped.append({
+                "resume_id": resume_id,
+                "file": resume.get("file_name", ""),
+                "status": resume["parse_status"],
+                "score": None,
+            })
+            continue
+        to_process.append((resume_id, resume))
+
+    # AI detection via Gemini (like app.py). It doesn't depend on the JD, so results are
+    # cached per resume text in ai_detections and only unseen texts go to Gemini, concurrently.
+    # Resumes stored without text (parsed by Gemini from the file itself) have nothing to audit and
+    # would all share the hash of "", so they get no detection (hash None) rather than a shared one
+    text_hashes = [
+        hashlib.sha256(text.encode("utf-8")).hexdigest() if (text := resume.get("content", {}).get("text", "")) else None
+        for _, resume in to_process
+    ]
+    detections = db.get_collection("ai_detections")
+    ai_by_hash = {
+        doc["_id"]: doc["ai"]
+        async for doc in detections.find({"_id": {"$in": list(set(text_hashes) - {None})}})
+    }
+    missing = {
+        h: resume for h, (_, resume) in zip(text_hashes, to_process) if h is not None and h not in ai_by_hash
+    }
+    if missing:
+        fresh = await asyncio.gather(*(
+            gemini_json(AI_DETECT_PROMPT, resume.get("content", {}).get("text", ""))
+            for resume in missing.values()
+        ))
+        ai_by_hash.update(zip(missing, fresh))
+        # Only cache usable detections; an unparseable reply is retried on the next score
+        usable = [h for h in missing if "ai_likelihood_percent" in ai_by_hash[h]]
+        try:
+            if usable:
+                await detections.insert_many(
+                    [{"_id": h, "ai": ai_by_hash[h]} for h in usable], ordered=False
+                )
+        except BulkWriteError as e:
+            # Another request detected the same text first
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    # Fuzzy experience similarity for every resume to score, in one batched pass
+    exp_sims = exp_similarities(
+        jd_resp_text, [resume.get("content", {}).get("text", "") for _, resume in to_process]
+    ).tolist()
+
+    new_docs = []
+    new_rows = []
+    for (resume_id, resume), text_hash, exp_sim in zip(to_process, text_hashes, exp_sims):
+        ai_struct = ai_by_hash.get(text_hash, {})
+        res_struct = resume.get("parsed_data") or {}
         ai_pct = int(ai_struct.get("ai_likelihood_percent", 0))
         ai_pct = max(0, min(100, ai_pct))
         # Improved AI validity: use a non-linear scale to avoid harsh penalty for moderate AI content
         validity_pct = 100 - int((ai_pct ** 1.2) / (100 ** 0.2))  # softer penalty for moderate AI
         validity_pct = max(0, min(100, validity_pct))
-        extracted_skills = extract_skills_from_bullets(res_struct.get("experience_bullets", []), jd_req_skills)
+        extracted_skills = extract_skills_from_bullets(res_struct.get("experience_bullets", []), jd_req_skills, skill_matcher)
         combined_skills = list(set(res_struct.get("skills", [])) | set(extracted_skills))
 
-        exp_sim = exp_similarity(jd_resp_text, res_text)
         skill_overlap = skills_overlap_score(jd_req_skills, combined_skills)
         traj = trajectory_alignment(jd_struct.get("seniority", "mid") if jd_struct else "mid",
                                    res_struct.get("seniority", "mid") if res_struct else "mid")
-        score = candidate_score(exp_sim, skill_overlap, traj, weights)
 
         # Persist the computed score in the scores collection for caching
-        db_doc = {
+        new_docs.append({
             "resume_id": resume_id,
             "jd_id": jd_id,
-            "overall_score": score,
-            "weights": {
-                "experience": float(weights.get("experience", 0.0)),
-                "skills": float(weights.get("skills", 0.0)),
-                "trajectory": float(weights.get("trajectory", 0.0)),
-            },
+            "weights": {"experience": we, "skills": ws, "trajectory": wt},
             "weights_hash": w_sig,
             "score_breakdown": {
                 "experience": exp_sim,
@@ -376,10 +375,9 @@ async def batch_score_resumes(
             "ai": ai_struct,
             "ai_pct": ai_pct,
             "validity_pct": validity_pct,
-        }
-        await scores_collection.insert_one(db_doc)
+        })
 
-        rows.append({
+        new_rows.append({
             "resume_id": resume_id,
             "file": resume.get("file_name", ""),
             "parsed": res_struct,
@@ -389,8 +387,31 @@ async def batch_score_resumes(
             "exp_sim": exp_sim,
             "skill_overlap": skill_overlap,
             "trajectory": traj,
-            "score": score,
         })
+    # Weighted scores for all new rows in one vectorized pass
+    scores = candidate_scores(
+        [r["exp_sim"] for r in new_rows],
+        [r["skill_overlap"] for r in new_rows],
+        [r["trajectory"] for r in new_rows],
+        we, ws, wt,
+    )
+    for doc, row, score in zip(new_docs, new_rows, scores.tolist()):
+        doc["overall_score"] = row["score"] = score
+    rows.extend(new_rows)
+    # Scores built on a failed AI detection aren't cached either, so they're recomputed next time
+    new_docs = [doc for doc in new_docs if "ai_likelihood_percent" in doc["ai"]]
+    if new_docs:
+        # One round trip; upserting on the unique cache key means a concurrent batch that
+        # cached the same pairs first simply wins instead of raising duplicate-key errors
+        await scores_collection.bulk_write([
+            UpdateOne(
+                {"resume_id": doc["resume_id"], "jd_id": jd_id, "weights_hash": w_sig},
+                {"$setOnInsert": doc},
+                upsert=True,
+            )
+            for doc in new_docs
+        ], ordered=False)
     # Return in descending order by score
     rows.sort(key=lambda r: r.get("score", 0.0), reverse=True)
-    return rows
+    # Unscored resumes go last, so clients can tell them apart from resumes that weren't found
+    return rows + skipped
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     APP_NAME: str = "Talent Intel AI"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # MongoDB Configuration
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
@@ -21,6 +22,8 @@ class Settings(BaseSettings):
     # AI Platform
     GOOGLE_CLOUD_PROJECT: Optional[str] = os.getenv("GOOGLE_CLOUD_PROJECT")
     GOOGLE_CLOUD_REGION: Optional[str] = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
+    # Gemini Developer API key; enables the Batch API for bulk resume ingestion
+    GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     
     class Config:
         case_sensitive = True
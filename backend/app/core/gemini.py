@@ -0,0 +1,113 @@
+import asyncio
+import json
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+import vertexai
+from vertexai.generative_models import GenerativeModel
+
+from app.core.config import settings
+
+try:
+    import orjson  # C JSON parser, several times faster than json.loads
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+try:
+    from google import genai  # google-genai, only needed for the Batch API
+except Exception:
+    genai = None
+
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+GEMINI_MAX_CONCURRENCY = 8  # in-flight Gemini calls per process (QPS guard)
+
+# One model object per (project, location, model), built on first use and reused
+# by every request so auth and the gRPC channel are set up only once
+_models: Dict[Tuple[Optional[str], Optional[str], str], GenerativeModel] = {}
+_lock = threading.Lock()
+
+def get_gemini(
+    model_name: str = GEMINI_MODEL_NAME,
+    project: Optional[str] = None,
+    location: Optional[str] = None,
+) -> GenerativeModel:
+    project = project or settings.GOOGLE_CLOUD_PROJECT
+    location = location or settings.GOOGLE_CLOUD_REGION
+    key = (project, location, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                vertexai.init(project=project, location=location)
+                model = _models[key] = GenerativeModel(model_name)
+    return model
+
+_PROMPT_WS = re.compile(r"\n\s+")
+_SCHEMA_BLOCK = re.compile(r"^\{$.*?^\}$", re.DOTALL | re.MULTILINE)
+_SCHEMA_WS = re.compile(r"\s*\n\s*")
+
+def compact_prompt(prompt: str) -> str:
+    # Run once at import: every call is billed for these input tokens. Puts the JSON schema
+    # block on one line and drops indentation and blank lines elsewhere.
+    prompt = _SCHEMA_BLOCK.sub(lambda m: _SCHEMA_WS.sub(" ", m.group(0)), prompt)
+    return _PROMPT_WS.sub("\n", prompt).strip()
+
+_FENCE = re.compile(r"^\s*`*\s*(?:json)?\s*|\s*`*\s*$", re.IGNORECASE)  # ```json ... ``` wrapper
+_JSON_SPAN = re.compile(r"\{.*\}", re.DOTALL)  # outermost {...} in a chatty response
+
+def parse_json_text(raw: str) -> dict:
+    # Gemini is asked for bare JSON; salvage the object if it wraps it in fences or prose
+    raw = _FENCE.sub("", raw)
+    try:
+        return _json_loads(raw)
+    except Exception:
+        m = _JSON_SPAN.search(raw)
+        if m:
+            try:
+                return _json_loads(m.group(0))
+            except Exception:
+                pass
+    return {}
+
+_sem = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+async def generate_content_async(contents, **kwargs):
+    # Non-blocking Gemini call on the shared model; callers can fan out with asyncio.gather
+    async with _sem:
+        return await get_gemini().generate_content_async(contents, **kwargs)
+
+_batch_client = None
+
+def get_batch_client():
+    # Gemini Developer API client for batches.create; None unless GEMINI_API_KEY and google-genai are available
+    global _batch_client
+    if _batch_client is None and genai is not None and settings.GEMINI_API_KEY:
+        with _lock:
+            if _batch_client is None:
+                _batch_client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    return _batch_client
+
+async def generate_json_async(contents, **kwargs) -> dict:
+    # Stream the response and stop reading as soon as the accumulated text is a complete JSON object
+    chunks = []
+    async with _sem:
+        stream = await get_gemini().generate_content_async(contents, stream=True, **kwargs)
+        try:
+            async for chunk in stream:
+                try:
+                    text = chunk.text
+                except Exception:  # chunk without text (e.g. safety/finish metadata)
+                    continue
+                chunks.append(text)
+                if text.rstrip().endswith(("}", "`")):
+                    try:
+                        return _json_loads(_FENCE.sub("", "".join(chunks)))
+                    except Exception:
+                        pass
+        finally:
+            # Returning early leaves the stream open; close it so the connection is released
+            await stream.aclose()
+    return parse_json_text("".join(chunks) or "{}")
@@ -1,19 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from motor.core import AgnosticDatabase
 from typing import Dict, Any, Optional
-import json
-from bson import ObjectId
-from datetime import datetime
+import logging
 
 from app.core.config import settings
 
-class JSONEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, ObjectId):
-            return str(o)
-        if isinstance(o, datetime):
-            return o.isoformat()
-        return json.JSONEncoder.default(self, o)
+log = logging.getLogger(__name__)
 
 class MongoDB:
     client: AsyncIOMotorClient = None
@@ -23,6 +15,30 @@ class MongoDB:
     async def connect_db(cls):
         cls.client = AsyncIOMotorClient(settings.MONGODB_URL)
         cls.db = cls.client[settings.MONGODB_DB_NAME]
+        await cls.ensure_indexes()
+        
+    @classmethod
+    async def ensure_indexes(cls):
+        # Dedup lookups by content hash become B-tree probes, and the unique
+        # constraint stops concurrent uploads of the same file/URL double-inserting
+        for collection, field in (("resumes", "file_hash"), ("job_descriptions", "url_hash")):
+            try:
+                await cls.db[collection].create_index(field, unique=True)
+            except Exception as e:
+                log.warning("could not create unique index %s.%s: %s", collection, field, e)
+        # Score cache lookups are point probes; the other two back the per-resume
+        # listing and the per-JD listing sorted by score. create_index is a no-op if present.
+        # Each index is built on its own, so legacy duplicates breaking the unique one don't cost the listings
+        scores = cls.db["scores"]
+        for keys, unique in (
+            ([("resume_id", 1), ("jd_id", 1), ("weights_hash", 1)], True),
+            ([("jd_id", 1), ("overall_score", -1)], False),
+            ("resume_id", False),
+        ):
+            try:
+                await scores.create_index(keys, unique=unique)
+            except Exception as e:
+                log.warning("could not create scores index %s: %s", keys, e)
         
     @classmethod
     async def close_db(cls):
@@ -37,7 +53,6 @@ class MongoDB:
     
     @classmethod
     def serialize_doc(cls, doc: Dict[str, Any]) -> Dict[str, Any]:
-        print("xyz")
         if not doc:
             return None
         # Convert ObjectId to string but keep the key as '_id'
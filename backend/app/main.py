@@ -3,29 +3,73 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import List, Optional
 import os
+import logging
+import httpx
 
 from .core.config import settings
-from .api.api_v1.api import api_router
+from .api.api_v1.api import api_router, ORJSONResponse
 from fastapi import FastAPI
 from app.db.mongodb import MongoDB
+from app.core.gemini import get_gemini
+from app.api.api_v1.endpoints.resumes import resume_pending_batches
 
 
 
 
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+log = logging.getLogger(__name__)
+
 # ...existing code...
 app = FastAPI(
     title="Talent Intel AI API",
     description="API for parsing resumes, job descriptions, and calculating matching scores",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 @app.on_event("startup")
 async def startup_db_client():
-    print("Connecting to MongoDB...")
+    log.info("Connecting to MongoDB...")
     await MongoDB.connect_db()
 
+@app.on_event("startup")
+async def startup_http_client():
+    # One pooled client for all outbound HTTP (JD scraping); keeps TCP/TLS connections warm
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        timeout=10.0,
+        follow_redirects=True,
+    )
+
+@app.on_event("startup")
+async def startup_gemini():
+    # Run vertexai.init and build the shared model up front so the first request doesn't pay for it
+    try:
+        get_gemini()
+    except Exception as e:
+        log.warning("Gemini warm-up failed, will retry on first use: %s", e)
+
+@app.on_event("startup")
+async def startup_resume_batches():
+    # Batch API results are collected in-process; restart polling for jobs a previous worker left pending
+    app.state.batch_tasks = set()
+    try:
+        await resume_pending_batches(app.state.batch_tasks, MongoDB.get_collection("resumes"))
+    except Exception as e:
+        log.warning("Could not resume pending Batch API jobs: %s", e)
+
+@app.on_event("shutdown")
+async def shutdown_batch_pollers():
+    # Pending jobs keep their lease only until it expires; another worker or the next start picks them up
+    for task in list(app.state.batch_tasks):
+        task.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     await MongoDB.close_db()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await app.state.http.aclose()
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -44,4 +88,4 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, log_level=settings.LOG_LEVEL.lower())
@@ -1,21 +1,23 @@
-from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, BinaryIO
+from pydantic import BaseModel, ConfigDict, Field
 import hashlib
+import io
+
+def utcnow() -> datetime:
+    # Timezone-aware replacement for the deprecated datetime.utcnow()
+    return datetime.now(timezone.utc)
 
 class BaseDocument(BaseModel):
-    id: Optional[str] = Field(alias="_id")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Pydantic v2 config; datetimes serialize to ISO 8601 natively, no custom encoders
+    model_config = ConfigDict(populate_by_name=True)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    id: Optional[str] = Field(default=None, alias="_id")
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
     
     def update_timestamps(self):
-        self.updated_at = datetime.utcnow()
+        self.updated_at = utcnow()
 
 class Resume(BaseDocument):
     file_hash: str
@@ -24,6 +26,8 @@ class Resume(BaseDocument):
     file_type: str
     content: Dict[str, Any]
     parsed_data: Optional[Dict[str, Any]] = None
+    parse_status: Optional[str] = None  # "pending" | "done" | "failed" for Batch API uploads
+    batch_job: Optional[str] = None
     
     @classmethod
     def create_from_upload(cls, file: bytes, file_name: str, content: Dict[str, Any]):
@@ -36,6 +40,29 @@ class Resume(BaseDocument):
             content=content,
             parsed_data=None
         )
+    
+    @classmethod
+    def create_from_stream(
+        cls,
+        stream: BinaryIO,
+        file_name: str,
+        content: Dict[str, Any],
+        file_type: Optional[str] = None,
+        file_hash: Optional[str] = None,
+    ):
+        # Builds from a binary file object (e.g. a spooled upload) without a second in-memory copy.
+        # Callers that hashed while receiving the upload pass file_hash; otherwise it is hashed in chunks.
+        if file_hash is None:
+            stream.seek(0)
+            file_hash = hashlib.file_digest(stream, "sha256").hexdigest()
+        return cls(
+            file_hash=file_hash,
+            file_name=file_name,
+            file_size=stream.seek(0, io.SEEK_END),
+            file_type=file_type or file_name.split('.')[-1].lower(),
+            content=content,
+            parsed_data=None
+        )
 
 class JobDescription(BaseDocument):
     url: str
@@ -59,3 +86,8 @@ class Score(BaseDocument):
     overall_score: float
     score_breakdown: Dict[str, float]
     feedback: Optional[Dict[str, Any]] = None
+
+# Finish schema building at import: a no-op while every annotation resolves,
+# but a model gaining a forward reference fails here instead of on its first request
+for _model in (Resume, JobDescription, Score):
+    _model.model_rebuild()
@@ -0,0 +1,104 @@
+"""Pure scoring functions for batch_score_resumes, independent of FastAPI and Mongo."""
+from typing import Dict, List
+import hashlib
+import json
+import numpy as np
+from rapidfuzz import fuzz, process
+
+try:
+    import ahocorasick  # pyahocorasick: multi-pattern matching in one pass over the text
+except Exception:
+    ahocorasick = None
+
+def skills_overlap_score(jd_skills, res_skills):
+    """
+    Fuzzy skill overlap: for each JD skill, find the best fuzzy match in resume skills.
+    Give partial credit for similar skills.
+    """
+    if not jd_skills or not res_skills:
+        return 0.0
+    jd = [s.strip().lower() for s in jd_skills]
+    rs = [s.strip().lower() for s in res_skills]
+    # Use both ratio and partial_ratio for better fuzzy matching; cdist scores every
+    # (jd, resume) pair in C++ instead of a Python double loop
+    ratio = process.cdist(jd, rs, scorer=fuzz.ratio, dtype=np.float32)
+    partial = process.cdist(jd, rs, scorer=fuzz.partial_ratio, dtype=np.float32)
+    best = np.maximum(ratio, partial).max(axis=1)
+    return float(best.mean()) / 100.0
+
+SENIORITY_MAP = {
+    "intern": 0, "junior": 1, "mid": 2, "senior": 3, "lead": 4,
+    "manager": 5, "director": 6, "executive": 7
+}
+# Alignment by seniority distance (0 -> 1.0, 1 -> 0.8, 2 -> 0.5, else 0.25), precomputed once
+TRAJ_LUT = np.array([
+    [1.0 if i == j else 0.8 if abs(i - j) == 1 else 0.5 if abs(i - j) == 2 else 0.25 for j in range(8)]
+    for i in range(8)
+])
+def trajectory_alignment(jd_level, resume_level):
+    a = SENIORITY_MAP.get((jd_level or "").lower(), 2)
+    b = SENIORITY_MAP.get((resume_level or "").lower(), 2)
+    return float(TRAJ_LUT[a, b])
+
+def candidate_scores(exp_sims, skill_overlaps, trajs, we: float, ws: float, wt: float) -> np.ndarray:
+    # Weighted sum for every resume at once, clipped to [0,1] and scaled to 0-100
+    score = (
+        we * np.asarray(exp_sims, dtype=np.float64) +
+        ws * np.asarray(skill_overlaps, dtype=np.float64) +
+        wt * np.asarray(trajs, dtype=np.float64)
+    )
+    return np.clip(score, 0.0, 1.0) * 100.0
+
+def build_skill_matcher(jd_skills: List[str]):
+    """
+    Aho-Corasick automaton over the JD skills, built once per JD and reused for every resume.
+    None when pyahocorasick isn't installed or there are no skills.
+    """
+    if ahocorasick is None or not jd_skills:
+        return None
+    matcher = ahocorasick.Automaton()
+    for skill in jd_skills:
+        key = skill.lower()
+        if key:
+            # Skills differing only by case share a key, so keep every original spelling
+            matcher.add_word(key, matcher.get(key, ()) + (skill,))
+    if len(matcher) == 0:
+        return None
+    matcher.make_automaton()
+    return matcher
+
+def extract_skills_from_bullets(bullets: List[str], jd_skills: List[str], matcher=None) -> List[str]:
+    """
+    Very simple rule-based extractor: check if JD skills appear in experience bullets text.
+    """
+    bullets_text = " ".join(bullets).lower()
+    if matcher is not None:
+        return list({skill for _, skills in matcher.iter(bullets_text) for skill in skills})
+    extracted = []
+    for skill in jd_skills:
+        if skill.lower() in bullets_text:
+            extracted.append(skill)
+    return list(set(extracted))
+
+# Improved embedding: use fuzzy token set ratio for experience similarity
+def exp_similarities(jd_text: str, res_texts: List[str]) -> np.ndarray:
+    """
+    Experience similarity of one JD against many resumes: two cdist calls preprocess
+    the JD once instead of once per resume.
+    """
+    if not jd_text or not res_texts:
+        return np.zeros(len(res_texts), dtype=np.float64)
+    # Combine token_set_ratio and partial_ratio for a more forgiving similarity
+    tsr = process.cdist([jd_text], res_texts, scorer=fuzz.token_set_ratio, dtype=np.float64)[0]
+    pr = process.cdist([jd_text], res_texts, scorer=fuzz.partial_ratio, dtype=np.float64)[0]
+    avg = (tsr + pr) / 2
+    # Non-linear scaling to boost mid-range scores
+    scaled = np.sqrt(avg / 100.0)  # sqrt scaling
+    # Apply a floor so even weak matches get a small score; empty resumes score 0
+    empty = np.fromiter((not t for t in res_texts), dtype=bool, count=len(res_texts))
+    return np.where(empty, 0.0, np.maximum(0.15, scaled))
+
+# Stable hash for weights to key cache; round values to avoid float noise
+def weights_signature(w: Dict[str, float]) -> str:
+    items = sorted((k, round(float(v), 6)) for k, v in w.items())
+    return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
@@ -1,19 +1,55 @@
 # app.py - SkillSight AI (MVP with Domain/Company Intelligence using Gemini only)
 
+import os
+
+# Read once when torch loads: use every core for intra-op math (containers often default to 1)
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+
 import streamlit as st
 import requests
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part, GenerationConfig
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 import torch
+import numpy as np
+from cachetools import LRUCache
 import json
+import hashlib
+import logging
 import re
-import os
+import asyncio
+import threading
 from dotenv import load_dotenv
 from google.oauth2 import service_account
 import json
 import base64
 
+try:
+    from pypdf import PdfReader  # text extraction for PDF uploads
+except Exception:
+    PdfReader = None
+
+log = logging.getLogger(__name__)
+
+# Persistent cache (falls back to a bounded in-process LRU)
+try:
+    import diskcache
+except Exception:
+    diskcache = None
+
+try:
+    import orjson  # C JSON parser, several times faster than json.loads
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+# Torch CPU threading: all cores for intra-op, a small inter-op pool
+torch.set_num_threads(os.cpu_count() or 1)
+try:
+    torch.set_num_interop_threads(2)
+except RuntimeError:
+    pass  # can only be set once per process; Streamlit reruns re-execute this module
+
 # ---------------------------
 # Load environment variables
 # ---------------------------
@@ -58,7 +94,9 @@ def _load_service_account_info() -> dict:
         "GOOGLE_APPLICATION_CREDENTIALS_JSON_B64, GOOGLE_APPLICATION_CREDENTIALS_JSON"
     )
 
-try:
+@st.cache_resource(show_spinner=False)
+def init_vertex() -> str:
+    """Load and validate the service account, then vertexai.init once per process (not per rerun)."""
     SERVICE_ACCOUNT_INFO = _load_service_account_info()
 
     # Ensure required fields are present
@@ -78,27 +116,32 @@ try:
 
     credentials = service_account.Credentials.from_service_account_info(SERVICE_ACCOUNT_INFO)
     project_id = SERVICE_ACCOUNT_INFO["project_id"]
+    vertexai.init(project=project_id, location="us-central1", credentials=credentials)
+    return project_id
+
+try:
+    project_id = init_vertex()
 except Exception as e:
     st.error(f"❌ Error initializing Google Cloud credentials: {e}")
     st.stop()
 
-vertexai.init(project=project_id, location="us-central1", credentials=credentials)
-
 # ---------------------------
 # Gemini Init with system instruction
 # ---------------------------
 
-gemini = GenerativeModel(
-    model_name="gemini-2.0-flash",
-    generation_config=GenerationConfig(
-        temperature=0.0,
-        top_p=1.0,
-        top_k=1,
-        candidate_count=1,
-        max_output_tokens=2048,
-    ),
-    system_instruction=Part.from_text(
-        """You are an expert AI that parses resumes, job descriptions, and company details. 
+@st.cache_resource(show_spinner=False)
+def get_gemini() -> GenerativeModel:
+    return GenerativeModel(
+        model_name="gemini-2.0-flash",
+        generation_config=GenerationConfig(
+            temperature=0.0,
+            top_p=1.0,
+            top_k=1,
+            candidate_count=1,
+            max_output_tokens=2048,
+        ),
+        system_instruction=Part.from_text(
+            """You are an expert AI that parses resumes, job descriptions, and company details. 
 Always return only valid JSON matching the expected schema of the task.
 
 Schemas:
@@ -126,10 +169,95 @@ Schemas:
 }
 
 Never include explanations, only output valid JSON."""
-    ),
+        ),
+    )
+
+gemini = get_gemini()
+
+GEMINI_MAX_CONCURRENCY = 8  # in-flight Gemini calls (Vertex QPS guard)
+
+def json_generation_config(schema: dict) -> GenerationConfig:
+    # Same sampling as the model default, plus constrained JSON output for the given schema
+    return GenerationConfig(
+        temperature=0.0,
+        top_p=1.0,
+        top_k=1,
+        candidate_count=1,
+        max_output_tokens=2048,
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+# Resume parse + AI detection in one call per resume
+RESUME_PROMPT = (
+    "Extract candidate experience, skills, companies worked at, and domain expertise into `parsed`, "
+    "and estimate the likelihood (0-100) that the resume was written by AI as `ai_likelihood`."
 )
+RESUME_CONFIG = json_generation_config({
+    "type": "OBJECT",
+    "properties": {
+        "parsed": {
+            "type": "OBJECT",
+            "properties": {
+                "skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "experience": {
+                    "type": "ARRAY",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "company": {"type": "STRING"},
+                            "role": {"type": "STRING"},
+                            "years": {"type": "NUMBER"},
+                            "domain": {"type": "STRING"},
+                        },
+                    },
+                },
+                "domains": {"type": "ARRAY", "items": {"type": "STRING"}},
+            },
+            "required": ["skills", "experience", "domains"],
+        },
+        "ai_likelihood": {"type": "INTEGER"},
+    },
+    "required": ["parsed", "ai_likelihood"],
+})
+
+# Company classifications for a JSON list of names in one call
+COMPANY_BATCH_SIZE = 25
+COMPANY_CONFIG = json_generation_config({
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "company": {"type": "STRING"},
+            "startup": {"type": "BOOLEAN"},
+            "type": {"type": "STRING", "enum": ["product", "service", "unknown"]},
+        },
+        "required": ["company", "startup", "type"],
+    },
+})
+
+EMBED_MODEL = "all-MiniLM-L6-v2"
+CACHE_FALLBACK_SIZE = 4096  # embeddings kept in-process when diskcache is missing
+CACHE_DIR = os.path.join(os.path.expanduser(os.getenv("TALENT_INTEL_CACHE_DIR", "~/.cache/talent_intel")), "skillsight")
+# Dynamically int8-quantized ONNX export shipped in the model repo (AVX2 build runs on any modern x86)
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+
+@st.cache_resource(show_spinner=False)
+def load_embedder() -> SentenceTransformer:
+    # On CPU prefer the quantized ONNX Runtime backend (sentence-transformers[onnx]);
+    # fall back to PyTorch FP32 when it isn't installed or on GPU
+    if not torch.cuda.is_available():
+        try:
+            return SentenceTransformer(
+                EMBED_MODEL,
+                backend="onnx",
+                model_kwargs={"file_name": EMBED_ONNX_FILE, "provider": "CPUExecutionProvider"},
+            )
+        except Exception as e:
+            log.warning("ONNX embedder unavailable, using PyTorch: %s", e)
+    return SentenceTransformer(EMBED_MODEL)
 
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+embedder = load_embedder()
 
 st.set_page_config(page_title="SkillSight AI", layout="wide")
 st.title("🛰️ SkillSight AI — Candidate Scoring MVP (Domain + Company Intelligence + Batch Mode)")
@@ -138,54 +266,175 @@ st.title("🛰️ SkillSight AI — Candidate Scoring MVP (Domain + Company Inte
 # Helpers
 # ---------------------------
 
+_FENCE_OPEN = re.compile(r"^```(?:json)?\s*")
+_FENCE_CLOSE = re.compile(r"\s*```\s*$")
+
+MAX_TEXT_CHARS = 5000  # text sent to Gemini / the embedder per document
+
+def _extract_upload_text(upload) -> str:
+    upload.seek(0)  # a previous run may have left the buffer at EOF
+    if PdfReader is not None and upload.name.lower().endswith(".pdf"):
+        try:
+            parts, n = [], 0
+            for page in PdfReader(upload).pages:
+                parts.append(page.extract_text() or "")
+                n += len(parts[-1])
+                if n >= MAX_TEXT_CHARS:
+                    break
+            return "\n".join(parts)[:MAX_TEXT_CHARS]
+        except Exception:
+            # Encrypted or malformed PDF: fall back to the raw byte decode below
+            upload.seek(0)
+    # UTF-8 is at most 4 bytes per char, so this many bytes always covers MAX_TEXT_CHARS
+    return upload.read(MAX_TEXT_CHARS * 4).decode("utf-8", errors="ignore")[:MAX_TEXT_CHARS]
+
+def read_upload_text(upload) -> str:
+    """Capped text of an uploaded file, extracted once per upload and kept across reruns."""
+    key = f"upload_text:{upload.file_id}"  # unique per upload, unlike name + size
+    if key not in st.session_state:
+        st.session_state[key] = _extract_upload_text(upload)
+    return st.session_state[key]
+
 def fetch_jd_text(url: str) -> str:
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
-    return r.text[:5000]
+    # Stream and stop after enough bytes for MAX_TEXT_CHARS instead of downloading the whole page
+    with requests.get(url, timeout=15, stream=True) as r:
+        r.raise_for_status()
+        buf = bytearray()
+        for chunk in r.iter_content(chunk_size=4096):
+            buf.extend(chunk)
+            if len(buf) >= MAX_TEXT_CHARS * 4:
+                break
+    return buf.decode("utf-8", errors="ignore")[:MAX_TEXT_CHARS]
 
 def parse_with_gemini(prompt: str, text: str) -> dict:
     response = gemini.generate_content([prompt, Part.from_text(text)])
+    return _parse_response(response)
+
+async def parse_with_gemini_async(prompt: str, text: str, sem: asyncio.Semaphore, generation_config=None) -> dict:
+    async with sem:
+        response = await gemini.generate_content_async(
+            [prompt, Part.from_text(text)], generation_config=generation_config
+        )
+    return _parse_response(response)
+
+def parse_many_with_gemini(jobs: list, generation_config=None) -> list:
+    """
+    Runs parse_with_gemini for every (prompt, text) pair concurrently, at most
+    GEMINI_MAX_CONCURRENCY in flight. Failed calls come back as exceptions, in order.
+    """
+    async def _run():
+        sem = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        return await asyncio.gather(
+            *(parse_with_gemini_async(prompt, text, sem, generation_config) for prompt, text in jobs),
+            return_exceptions=True,
+        )
+    return asyncio.run_coroutine_threadsafe(_run(), get_event_loop()).result()
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    # One long-lived loop for all Gemini async calls: the cached model's async client
+    # binds to the loop it was first used on, so a fresh asyncio.run per rerun would break it
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def _parse_response(response) -> dict:
     raw = response.candidates[0].content.parts[0].text.strip()
 
     # 🔧 Clean output (remove markdown wrappers like ```json ... ```)
-    cleaned = re.sub(r"^```(json)?", "", raw)
-    cleaned = re.sub(r"```$", "", cleaned).strip()
+    cleaned = _FENCE_CLOSE.sub("", _FENCE_OPEN.sub("", raw)).strip()
 
     try:
-        return json.loads(cleaned)
+        return _json_loads(cleaned)
     except Exception:
         # fallback: show raw text if JSON decoding fails
         return {"error": "invalid_json", "raw": raw}
 
-def get_embedding(text: str):
-    return embedder.encode(text, convert_to_tensor=True)
+@st.cache_resource(show_spinner=False)
+def get_cache():
+    # Content-addressed embedding cache; survives reruns, sessions and restarts
+    return diskcache.Cache(CACHE_DIR) if diskcache else LRUCache(maxsize=CACHE_FALLBACK_SIZE)
+
+def _emb_key(text: str) -> str:
+    # Keyed on model + backend too: ONNX int8 and PyTorch FP32 vectors differ slightly
+    tag = f"{EMBED_MODEL}\x00{getattr(embedder, 'backend', 'torch')}\x00{EMBED_ONNX_FILE}"
+    return hashlib.sha256(f"{tag}\x00{text}".encode("utf-8")).hexdigest()
 
-def compute_similarity(text1: str, text2: str):
-    emb1, emb2 = get_embedding(text1), get_embedding(text2)
-    return float(util.pytorch_cos_sim(emb1, emb2).item())
+def _quantize(embs: torch.Tensor):
+    # Per-row symmetric int8 (4x smaller than float32 at rest): q * scale ~= emb
+    scale = embs.abs().amax(dim=1, keepdim=True).clamp_min(1e-12) / 127
+    return torch.round(embs / scale).to(torch.int8), scale
+
+def embed_texts(texts: list):
+    """
+    Unit-normalized embeddings for texts, so a plain dot product is the cosine similarity.
+    Vectors are cached on disk as int8 + per-row scale; only unseen texts are encoded.
+    """
+    cache = get_cache()
+    keys = [_emb_key(t) for t in texts]
+    found = {}
+    for k in dict.fromkeys(keys):
+        hit = cache.get(k)
+        if hit is not None:
+            found[k] = hit
+    pending = {k: t for k, t in zip(keys, texts) if k not in found}
+    if pending:
+        # One encode call for every new text; encode length-sorts internally so each batch pads minimally
+        with torch.inference_mode():
+            embs = embedder.encode(
+                list(pending.values()), batch_size=64, convert_to_tensor=True,
+                normalize_embeddings=True, show_progress_bar=False,
+            )
+            q, scale = _quantize(embs.float().cpu())
+        for k, qi, si in zip(pending, q, scale):
+            found[k] = cache[k] = (qi.numpy().tobytes(), float(si))
+
+    # Dequantize cached and fresh vectors alike so repeat runs score identically, then re-normalize
+    q = torch.stack([torch.frombuffer(bytearray(found[k][0]), dtype=torch.int8) for k in keys])
+    scale = torch.tensor([found[k][1] for k in keys]).unsqueeze(1)
+    return torch.nn.functional.normalize(q.float() * scale, dim=1)
 
 # ---------------------------
 # Company Intelligence using Gemini
 # ---------------------------
 
-def lookup_company_info(company: str) -> dict:
-    """
-    Uses Gemini to classify company as startup/enterprise and product/service.
+COMPANY_PROMPT = (
+    "For each company name in the JSON list, classify it as a startup or not and as a "
+    "product or service company. Return one entry per name, echoing the name as `company`."
+)
+
+@st.cache_resource
+def get_company_cache() -> dict:
+    # Normalized company name -> classification, shared across reruns and sessions
+    return {}
+
+def lookup_companies(companies) -> dict:
     """
-    prompt = f"""
-    Analyze the company name: \"{company}\" and classify into JSON with fields:
-    {{
-        "startup": true/false,
-        "type": "product" or "service"
-    }}
-    Return only valid JSON.
+    Uses Gemini to classify companies as startup/enterprise and product/service.
+    Each distinct name is looked up once, in batches of COMPANY_BATCH_SIZE sent concurrently;
+    returns normalized name -> info.
     """
-    try:
-        result = parse_with_gemini(prompt, company)
-        return json.loads(result)
-    except Exception as e:
-        print("Gemini company info error:", e)
-        return {"startup": False, "type": "unknown"}
+    cache = get_company_cache()
+    names = {c.strip().lower(): c.strip() for c in companies if c and c.strip()}
+    missing = [key for key in names if key not in cache]
+    if missing:
+        chunks = [missing[k:k + COMPANY_BATCH_SIZE] for k in range(0, len(missing), COMPANY_BATCH_SIZE)]
+        results = parse_many_with_gemini(
+            [(COMPANY_PROMPT, json.dumps([names[key] for key in chunk])) for chunk in chunks],
+            generation_config=COMPANY_CONFIG,
+        )
+        for chunk, result in zip(chunks, results):
+            if not isinstance(result, list):
+                log.warning("Gemini company info error: %s", result)
+                continue
+            for entry in result:
+                if not isinstance(entry, dict):
+                    continue
+                key = str(entry.get("company", "")).strip().lower()
+                if key in names:
+                    cache[key] = {"startup": bool(entry.get("startup", False)), "type": entry.get("type", "unknown")}
+    unknown = {"startup": False, "type": "unknown"}
+    return {key: cache.get(key, unknown) for key in names}
 
 # ---------------------------
 # UI
@@ -205,7 +454,7 @@ resumes = st.file_uploader("📄 Upload candidate resumes", accept_multiple_file
 job_descriptions = []
 if batch_mode and jd_files:
     for jd in jd_files:
-        text = jd.read().decode("utf-8", errors="ignore")[:5000]
+        text = read_upload_text(jd)
         structured = parse_with_gemini(
             "Extract responsibilities, required skills, and domain (industry/sector) as JSON.",
             text,
@@ -221,72 +470,74 @@ elif not batch_mode and "jd_url" in locals() and jd_url:
 
 # Process resumes vs JDs
 if job_descriptions and resumes:
-    for jd in job_descriptions:
-        st.subheader(f"📋 Job Description Extracted — {jd['name']}")
-        st.json(jd["structured"])
+    # Score everything first under one status block, then render; per-resume spinners and
+    # widgets inside the scoring loop cost a frontend round trip each
+    with st.status(f"Scoring {len(resumes)} candidates against {len(job_descriptions)} job description(s)...", expanded=False) as status:
+        # Read each upload once (bounded, cached across reruns)
+        resume_texts = [read_upload_text(resume) for resume in resumes]
+
+        # Embed every JD and resume in one batched pass -> (JDs x resumes) cosine matrix
+        st.write("Embedding resumes and job descriptions...")
+        embs = embed_texts([jd["raw"] for jd in job_descriptions] + resume_texts)
+        n_jd = len(job_descriptions)
+        sim_matrix = torch.mm(embs[:n_jd], embs[n_jd:].T).tolist()  # one GEMM, one device->host copy
+
+        # Resume parsing and AI detection don't depend on the JD: one schema-constrained call
+        # per resume covers both, all resumes concurrently, instead of serially inside the JD loop
+        st.write(f"Analyzing {len(resumes)} resumes...")
+        results = parse_many_with_gemini([(RESUME_PROMPT, t) for t in resume_texts], generation_config=RESUME_CONFIG)
+        resume_structs = [r.get("parsed") if isinstance(r, dict) else r for r in results]
+        ai_detects = [{"ai_likelihood": r.get("ai_likelihood")} if isinstance(r, dict) else r for r in results]
+
+        # Company intelligence for every distinct company across all resumes, once
+        st.write("Classifying companies...")
+        company_info = lookup_companies(
+            exp.get("company", "")
+            for r in resume_structs if isinstance(r, dict)
+            for exp in r.get("experience", [])
+        )
 
-        candidates = []
-        for resume in resumes:
-            with st.spinner(f"Processing {resume.name}..."):
-                text = resume.read().decode("utf-8", errors="ignore")[:5000]
+        rankings = []
+        for j, jd in enumerate(job_descriptions):
+            # JD domain vocabulary, built once and reused for every candidate
+            jd_struct = jd["structured"] if isinstance(jd["structured"], dict) else {}  # parse_with_gemini already returns dicts
+            jd_domain_tokens = frozenset((jd_struct.get("domain") or "").lower().split()) if "domain" in jd_struct else None
 
-                # Parse resume
-                resume_struct = parse_with_gemini(
-                    "Extract candidate experience, skills, companies worked at, and domain expertise as JSON.",
-                    text,
-                )
+            candidates = []
+            for i, (resume, text) in enumerate(zip(resumes, resume_texts)):
+                # Parsed resume
+                resume_struct = resume_structs[i]
                 if not isinstance(resume_struct, dict):
                     resume_struct = {"skills": [], "experience": []}
 
                 # AI detection
-                ai_detect = parse_with_gemini(
-                    "Estimate the likelihood (0-100) that the following resume was written by AI.",
-                    text,
-                )
+                ai_detect = ai_detects[i]
                 try:
-                    ai_score = int(re.findall(r"\\d+", ai_detect)[0])
-                except Exception:
+                    ai_score = max(0, min(100, int(ai_detect.get("ai_likelihood", 50))))
+                except Exception:  # failed call or missing/non-numeric value
                     ai_score = 50
 
                 # Compute similarity
-                sim = compute_similarity(jd["raw"], text)
+                sim = sim_matrix[j][i]
                 exp_score = round(sim * 100, 2)
 
-                # Domain matching
+                # Domain matching: share of experience entries whose domain shares a word with the JD's
                 domain_match = 0
-                jd_struct = json.loads(jd["structured"]) if isinstance(jd["structured"], str) else jd["structured"]
-                if "domain" in jd_struct:
-                    jd_domain = jd_struct.get("domain", "").lower()
-                    candidate_domains = [exp.get("domain", "").lower() for exp in resume_struct.get("experience", [])]
+                if jd_domain_tokens is not None:
+                    candidate_domains = [frozenset(exp.get("domain", "").lower().split()) for exp in resume_struct.get("experience", [])]
                     if candidate_domains:
-                        domain_match = int((sum(1 for d in candidate_domains if jd_domain in d) / len(candidate_domains)) * 100)
+                        domain_match = int((sum(1 for d in candidate_domains if d & jd_domain_tokens) / len(candidate_domains)) * 100)
 
                 # Company intelligence (startup/product/service)
                 company_insights = []
                 for exp in resume_struct.get("experience", []):
                     company_name = exp.get("company", "")
-                    if company_name:
-                        company_info = lookup_company_info(company_name)
-                        company_insights.append({company_name: company_info})
-
-                # Domain-weighted adjustment (require at least 50% domain match for bonus)
-                domain_bonus = 0
-                if domain_match >= 50:
-                    domain_bonus = 10
-
-                # Final Score (weighted)
-                final_score = (
-                    (0.30 * exp_score)
-                    + (0.20 * len(resume_struct.get("skills", [])))
-                    + (0.30 * domain_match)
-                    - (0.10 * (ai_score / 100) * 100)
-                    + domain_bonus
-                )
-                final_score = max(0, min(100, round(final_score, 2)))
+                    if company_name and company_name.strip().lower() in company_info:
+                        company_insights.append({company_name: company_info[company_name.strip().lower()]})
 
                 candidates.append({
                     "name": resume.name,
-                    "score": final_score,
+                    "n_skills": len(resume_struct.get("skills", [])),
                     "experience_score": exp_score,
                     "domain_match": domain_match,
                     "ai_likelihood": ai_score,
@@ -294,21 +545,56 @@ if job_descriptions and resumes:
                     "company_insights": company_insights
                 })
 
+            # Final Score (weighted) for every candidate at once, with the domain-weighted
+            # adjustment (require at least 50% domain match for bonus)
+            exp_scores, n_skills, domain_matches, ai_scores = np.array(
+                [[c["experience_score"], c["n_skills"], c["domain_match"], c["ai_likelihood"]] for c in candidates],
+                dtype=np.float64,
+            ).reshape(-1, 4).T
+            final_scores = (
+                (0.30 * exp_scores)
+                + (0.20 * n_skills)
+                + (0.30 * domain_matches)
+                - (0.10 * ai_scores)
+                + np.where(domain_matches >= 50, 10, 0)
+            )
+            final_scores = np.clip(np.round(final_scores, 2), 0, 100).tolist()
+            for c, score in zip(candidates, final_scores):
+                c["score"] = score
+
+            top = np.argsort([-score for score in final_scores], kind="stable")[:5]
+            rankings.append((jd, [candidates[k] for k in top]))
+
+        status.update(label=f"Scored {len(resumes)} candidates", state="complete")
+
+    for jd, candidates in rankings:
+        st.subheader(f"📋 Job Description Extracted — {jd['name']}")
+        st.json(jd["structured"])
+
+        # One grid for the shortlist instead of a metric/progress/markdown set per candidate
         st.subheader("🏆 Top 5 Candidates")
-        candidates = sorted(candidates, key=lambda x: x["score"], reverse=True)[:5]
+        st.dataframe(
+            [
+                {
+                    "Candidate": c["name"],
+                    "Candidate Score": c["score"],
+                    "Experience Match %": c["experience_score"],
+                    "Domain Match %": c["domain_match"],
+                    "Resume Validity % Human": 100 - c["ai_likelihood"],
+                }
+                for c in candidates
+            ],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Candidate Score": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.2f"),
+            },
+        )
 
         for c in candidates:
-            st.markdown(f"### {c['name']}")
-            st.metric("Candidate Score", f"{c['score']} / 100")
-            st.progress(c["score"] / 100)
-
-            st.write("📊 Breakdown:")
-            st.write(f"- Experience Match: {c['experience_score']}%")
-            st.write(f"- Domain Match: {c['domain_match']}%")
-            st.write(f"- Resume Validity: {100 - c['ai_likelihood']}% Human")
-
-            st.write("🧑 Resume Parsed Data:")
-            st.json(c["resume_struct"])
+            with st.expander(f"{c['name']} — details"):
+                st.write("🧑 Resume Parsed Data:")
+                st.json(c["resume_struct"])
 
-            st.write("🏢 Company Insights:")
-            st.json(c["company_insights"])
+                st.write("🏢 Company Insights:")
+                st.json(c["company_insights"])